@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Excel Building Management generator
+Builds a large synthetic portfolio and reports write time and file size.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from excel_generate_v2 import (
+    COMPRESSION_LEVELS,
+    build_workbook,
+    generate_excel,
+    generate_statements,
+    parse_formats,
+    save_workbook,
+)
+
+MONTHS = [
+    'يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
+    'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر'
+]
+UNIT_TYPES = ['استديو', 'شقة غرفة وصالة', 'شقة غرفتين وصالة', 'محل تجاري']
+UNIT_STATUSES = ['مُؤجّرة', 'شاغرة']
+PAYMENT_METHODS = ['تحويل بنكي', 'نقداً', 'شيك']
+EXPENSE_TYPES = [
+    ('فاتورة كهرباء', 'فواتير'),
+    ('فاتورة مياه', 'فواتير'),
+    ('صيانة مصعد', 'صيانة'),
+    ('تنظيف', 'خدمات'),
+]
+
+
+def make_synthetic_config(
+    buildings: int = 50,
+    units_per_building: int = 40,
+    months: int = 24,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """
+    Build a synthetic portfolio configuration.
+
+    Every unit is rented and has one rent record per month; roughly one
+    rent in ten is unpaid and one note in twenty is non-empty.
+
+    Args:
+        buildings: Number of buildings
+        units_per_building: Units in each building
+        months: Months of rent history per unit
+        seed: Random seed, so runs are reproducible
+
+    Returns:
+        Configuration dictionary in the config.json format
+    """
+    rng = random.Random(seed)
+    config: Dict[str, Any] = {
+        'buildings': [], 'units': [], 'tenants': [], 'rents_paid': [], 'expenses': []
+    }
+
+    def note() -> str:
+        return 'تحتاج إلى متابعة' if rng.random() < 0.05 else ''
+
+    for b in range(buildings):
+        building = f'عمارة {b + 1}'
+        config['buildings'].append(
+            {'name': building, 'units': units_per_building, 'notes': note()}
+        )
+
+        for u in range(units_per_building):
+            unit_no = f'{b + 1}-{u + 101}'
+            rent = rng.choice([2000, 3500, 4500, 6000])
+            config['units'].append({
+                'unit_no': unit_no, 'building': building,
+                'type': rng.choice(UNIT_TYPES), 'rent': rent,
+                'status': rng.choice(UNIT_STATUSES), 'notes': note()
+            })
+            config['tenants'].append({
+                'unit_no': unit_no, 'name': f'مستأجر {b + 1}-{u + 1}',
+                'id': str(1000000000 + b * 1000 + u), 'mobile': f'05{rng.randrange(10**8):08d}',
+                'start_date': '2024-01-01', 'end_date': '2025-12-31', 'rent': rent,
+                'email': '', 'notes': note()
+            })
+
+            for m in range(months):
+                year, month = 2024 + m // 12, m % 12
+                paid = rng.random() >= 0.1
+                config['rents_paid'].append({
+                    'unit_no': unit_no, 'month': MONTHS[month], 'year': year,
+                    'amount': rent,
+                    'date': f'{year}-{month + 1:02d}-05' if paid else None,
+                    'method': rng.choice(PAYMENT_METHODS) if paid else '',
+                    'status': 'مدفوع' if paid else 'غير مدفوع', 'notes': note()
+                })
+
+        for m in range(months):
+            year, month = 2024 + m // 12, m % 12
+            for expense_type, category in EXPENSE_TYPES:
+                config['expenses'].append({
+                    'building': building, 'date': f'{year}-{month + 1:02d}-01',
+                    'type': expense_type, 'amount': rng.randrange(100, 2000),
+                    'category': category, 'notes': note()
+                })
+
+    return config
+
+
+def compare_compression(config: Dict[str, Any]) -> int:
+    """
+    Build one workbook and report save time and file size per compression level.
+
+    Args:
+        config: Configuration to build the workbook from
+
+    Returns:
+        Exit code (0 for success)
+    """
+    started = time.perf_counter()
+    wb = build_workbook(config)
+    print(f"Build time: {time.perf_counter() - started:.2f} s")
+
+    print(f"{'Level':<8} {'Save time':>10} {'File size':>10}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for level in COMPRESSION_LEVELS:
+            output_path = Path(tmpdir) / f'{level}.xlsx'
+            started = time.perf_counter()
+            save_workbook(wb, output_path, level)
+            elapsed = time.perf_counter() - started
+            size = output_path.stat().st_size
+            print(f"{level:<8} {elapsed:>8.2f} s {size / 1024 / 1024:>7.2f} MB")
+    return 0
+
+
+def main() -> int:
+    """
+    Main entry point for the benchmark.
+
+    Returns:
+        Exit code (0 for success)
+    """
+    parser = argparse.ArgumentParser(
+        description='Benchmark Excel generation on a synthetic portfolio'
+    )
+    parser.add_argument('--buildings', type=int, default=50, help='Number of buildings')
+    parser.add_argument('--units', type=int, default=40, help='Units per building')
+    parser.add_argument('--months', type=int, default=24, help='Months of rent history')
+    parser.add_argument('--formats', type=parse_formats, default=('xlsx',),
+                        help='Comma-separated output formats (default: xlsx)')
+    parser.add_argument('--compression', choices=[*COMPRESSION_LEVELS, 'all'], default='default',
+                        help='Zip compression of the xlsx; "all" compares save time '
+                             'and size of every level on one workbook')
+    parser.add_argument('--statements', action='store_true',
+                        help='Benchmark per-tenant statements instead of the workbook')
+    parser.add_argument('--jobs', type=int, help='Worker processes for --statements')
+    args = parser.parse_args()
+
+    config = make_synthetic_config(args.buildings, args.units, args.months)
+    rows = sum(len(config[key]) for key in config)
+    print(f"Synthetic portfolio: {rows} rows ({len(config['rents_paid'])} rents)")
+
+    if args.compression == 'all':
+        return compare_compression(config)
+
+    if args.statements:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            generate_statements(config, Path(tmpdir), jobs=args.jobs,
+                                compression=args.compression)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output_path = Path(tmpdir) / 'benchmark.xlsx'
+        started = time.perf_counter()
+        generate_excel(config, output_path, formats=args.formats, compression=args.compression)
+        elapsed = time.perf_counter() - started
+        size = sum(path.stat().st_size for path in Path(tmpdir).iterdir())
+
+    print(f"Write time: {elapsed:.2f} s")
+    print(f"File size:  {size / 1024 / 1024:.2f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
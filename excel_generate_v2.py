@@ -4,17 +4,35 @@ Excel Generator for Building Management
 Generates Excel spreadsheets for managing buildings, units, tenants, rents, and expenses.
 """
 
+import abc
 import argparse
+import csv
+import glob
 import json
+import os
+import re
 import sys
-from datetime import datetime
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from copy import copy
+from datetime import date, datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+)
 
 import openpyxl
+from openpyxl.cell import Cell, WriteOnlyCell
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.utils.indexed_list import IndexedList
 from openpyxl.utils import get_column_letter
 from openpyxl.workbook import Workbook
+from openpyxl.packaging.relationship import get_rels_path
+from openpyxl.writer.excel import ExcelWriter
 from openpyxl.worksheet.worksheet import Worksheet
 
 
@@ -29,7 +47,7 @@ def set_cell_style(
     Apply formatting to a cell.
 
     Args:
-        cell: Excel cell to format
+        cell: Excel cell (or row/column dimension) to format
         font_size: Font size (default: 12)
         bold: Make font bold (default: False)
         bg_color: Background color in hex format (default: None)
@@ -49,9 +67,13 @@ def set_cell_style(
     cell.alignment = Alignment(horizontal=align, vertical='center')
 
 
-def load_config(config_path: Path) -> Dict[str, Any]:
+# Config sections holding record lists, in workbook order
+CONFIG_SECTIONS = ['buildings', 'units', 'tenants', 'rents_paid', 'expenses']
+
+
+def _load_json_file(config_path: Path) -> Dict[str, Any]:
     """
-    Load configuration from JSON file.
+    Load a single JSON configuration file.
 
     Args:
         config_path: Path to configuration file
@@ -74,12 +96,282 @@ def load_config(config_path: Path) -> Dict[str, Any]:
             return json.load(f)
     except json.JSONDecodeError as e:
         raise json.JSONDecodeError(
-            f"Invalid JSON in configuration file: {e.msg}",
+            f"Invalid JSON in configuration file {config_path}: {e.msg}",
             e.doc,
             e.pos
         )
 
 
+def resolve_config_paths(config_path: Path) -> List[Path]:
+    """
+    Expand a config source into the list of JSON files it refers to.
+
+    Args:
+        config_path: A JSON file, a directory of JSON shards, or a glob pattern
+
+    Returns:
+        Sorted list of configuration file paths
+
+    Raises:
+        FileNotFoundError: If a directory or glob matches no JSON files
+    """
+    if config_path.is_dir():
+        paths = sorted(config_path.glob('*.json'))
+    elif glob.has_magic(str(config_path)):
+        paths = sorted(Path(p) for p in glob.glob(str(config_path)))
+    else:
+        return [config_path]
+
+    if not paths:
+        raise FileNotFoundError(f"No configuration files found in: {config_path}")
+    return paths
+
+
+def merge_configs(configs: List[Dict[str, Any]], sources: List[Path]) -> Dict[str, Any]:
+    """
+    Merge sharded configurations into a single configuration.
+
+    Record lists are concatenated in shard order. Scalar settings such as
+    output_filename are taken from the first shard that defines them.
+
+    Args:
+        configs: Parsed shard configurations
+        sources: Shard file paths, used in error messages
+
+    Returns:
+        Merged configuration dictionary
+
+    Raises:
+        ValueError: If a record section is not a list, or a building name,
+            or a unit_no within a building, is defined more than once
+    """
+    merged: Dict[str, Any] = {key: [] for key in CONFIG_SECTIONS}
+    building_sources: Dict[str, Path] = {}
+    unit_sources: Dict[Tuple[str, str], Path] = {}
+    errors = []
+
+    for config, source in zip(configs, sources):
+        for key, value in config.items():
+            if key in CONFIG_SECTIONS:
+                if not isinstance(value, list):
+                    raise ValueError(
+                        f"Section '{key}' in {source} must be a list of records, "
+                        f"got {type(value).__name__}"
+                    )
+                merged[key].extend(value)
+            elif key not in merged:
+                merged[key] = value
+
+        # Records that aren't objects are left for the validator to report
+        for building in config.get('buildings', []):
+            if not isinstance(building, dict):
+                continue
+            name = building.get('name', '')
+            if name in building_sources:
+                errors.append(
+                    f"Duplicate building '{name}' in {source} "
+                    f"(first defined in {building_sources[name]})"
+                )
+            else:
+                building_sources[name] = source
+
+        for unit in config.get('units', []):
+            if not isinstance(unit, dict):
+                continue
+            unit_key = (unit.get('building', ''), str(unit.get('unit_no', '')))
+            if unit_key in unit_sources:
+                errors.append(
+                    f"Duplicate unit '{unit_key[1]}' in building '{unit_key[0]}' in {source} "
+                    f"(first defined in {unit_sources[unit_key]})"
+                )
+            else:
+                unit_sources[unit_key] = source
+
+    if errors:
+        raise ValueError("Conflicting configuration shards:\n  " + "\n  ".join(errors))
+    return merged
+
+
+def load_config(config_path: Path, max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Load configuration from a JSON file, a directory of shards or a glob.
+
+    Shard files are parsed concurrently and merged with duplicate detection.
+
+    Args:
+        config_path: Path to configuration file, shard directory or glob pattern
+        max_workers: Worker threads used to parse shards (default: executor default)
+
+    Returns:
+        Dictionary containing configuration data
+
+    Raises:
+        FileNotFoundError: If config file doesn't exist
+        json.JSONDecodeError: If config file is invalid JSON
+        ValueError: If shards define the same building or unit twice
+    """
+    paths = resolve_config_paths(config_path)
+    if len(paths) == 1 and paths[0] == config_path:
+        return _load_json_file(config_path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        configs = list(executor.map(_load_json_file, paths))
+    return merge_configs(configs, paths)
+
+
+def _current_rss() -> Optional[int]:
+    """
+    Return the resident set size of this process in bytes.
+
+    Returns:
+        RSS in bytes, or None where /proc is unavailable (non-Linux)
+    """
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+
+class MemoryBudget:
+    """
+    Memory ceiling for a generation run.
+
+    Memory is measured as the process RSS where /proc is available. Other
+    platforms fall back to tracemalloc, which only counts allocations made
+    after the budget is created and slows allocation-heavy code down
+    considerably, so the budget should be created before the configuration
+    is loaded.
+
+    Attributes:
+        limit: Maximum memory in bytes
+        spilled_bytes: Bytes of config records moved to temporary files
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.spilled_bytes = 0
+        self._peak = 0
+        self._use_rss = _current_rss() is not None
+        self._started = not self._use_rss and not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+
+    def used(self) -> int:
+        """Return the current memory use in bytes."""
+        if self._use_rss:
+            used = _current_rss() or 0
+        else:
+            used = tracemalloc.get_traced_memory()[0]
+        self._peak = max(self._peak, used)
+        return used
+
+    def peak(self) -> int:
+        """Return the peak memory use in bytes."""
+        if self._use_rss:
+            import resource
+            # ru_maxrss is in kilobytes on Linux
+            return max(self._peak, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+        return tracemalloc.get_traced_memory()[1]
+
+    def exceeded(self) -> bool:
+        """Return True once memory use has reached the limit."""
+        return self.used() >= self.limit
+
+    def stop(self) -> None:
+        """Stop tracing if this budget started it."""
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+
+class SpilledRecords:
+    """
+    Config records moved out of memory into a temporary JSON-lines file.
+
+    Iterating yields the records again, one at a time, in their original
+    order. The file is removed when the object is closed or collected.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]) -> None:
+        self._file = tempfile.TemporaryFile(prefix='excel_generate.', suffix='.jsonl')
+        self._count = 0
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False).encode('utf-8'))
+            self._file.write(b'\n')
+            self._count += 1
+        self.size = self._file.tell()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self._file.seek(0)
+        for line in self._file:
+            yield json.loads(line)
+
+    def close(self) -> None:
+        """Delete the temporary file."""
+        self._file.close()
+
+
+def spill_sections(config: Dict[str, Any], budget: MemoryBudget) -> List[str]:
+    """
+    Move record sections to temporary files until memory is under budget.
+
+    The largest sections are spilled first, and spilling stops as soon as
+    memory use is under the limit. Each spilled list is replaced in config
+    by a SpilledRecords object; the records are only freed if nothing
+    else refers to the list, so the caller must hand over ownership of
+    config.
+
+    Args:
+        config: Configuration dictionary, modified in place; sections that
+            were already written should have been removed from it
+        budget: Memory budget to satisfy
+
+    Returns:
+        Config keys of the sections that were spilled
+    """
+    spilled = []
+    candidates = [key for key in CONFIG_SECTIONS if isinstance(config.get(key), list)]
+    candidates.sort(key=lambda key: len(config[key]), reverse=True)
+
+    for key in candidates:
+        if not budget.exceeded() or not config[key]:
+            break
+        records = SpilledRecords(config[key])
+        config[key] = records
+        budget.spilled_bytes += records.size
+        spilled.append(key)
+
+    return spilled
+
+
+def parse_memory_size(text: str) -> int:
+    """
+    Parse a memory size such as 512M, 2G or 1048576 into bytes.
+
+    Args:
+        text: Size with an optional K, M or G suffix (powers of 1024)
+
+    Returns:
+        Size in bytes
+
+    Raises:
+        ValueError: If the size is not a positive number
+    """
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper().rstrip('B')
+    multiplier = units.get(text[-1:], 1)
+    number = text[:-1] if text[-1:] in units else text
+    size = int(float(number) * multiplier)
+    if size <= 0:
+        raise ValueError(f"Memory size must be positive: {text}")
+    return size
+
+
 def parse_date(date_str: Optional[str]) -> Optional[datetime]:
     """
     Parse date string to datetime object.
@@ -99,6 +391,576 @@ def parse_date(date_str: Optional[str]) -> Optional[datetime]:
         return None
 
 
+class FieldSchema(NamedTuple):
+    """
+    Schema of one record field.
+
+    Attributes:
+        name: Field name in the record
+        kind: One of 'text', 'integer', 'number', 'date' or 'id'
+            ('id' accepts text or an integer, e.g. unit numbers)
+        required: Whether the field must be present and non-empty
+        choices: Allowed values, if the field is an enum
+    """
+    name: str
+    kind: str
+    required: bool = False
+    choices: Optional[FrozenSet[str]] = None
+
+
+RENT_STATUSES = frozenset({'مدفوع', 'غير مدفوع'})
+PAYMENT_METHODS = frozenset({'', 'تحويل بنكي', 'نقداً', 'شيك'})
+
+CONFIG_SCHEMA: Dict[str, List[FieldSchema]] = {
+    'buildings': [
+        FieldSchema('name', 'text', required=True),
+        FieldSchema('units', 'integer'),
+        FieldSchema('notes', 'text'),
+    ],
+    'units': [
+        FieldSchema('unit_no', 'id', required=True),
+        FieldSchema('building', 'text', required=True),
+        FieldSchema('type', 'text'),
+        FieldSchema('rent', 'number'),
+        FieldSchema('status', 'text'),
+        FieldSchema('notes', 'text'),
+    ],
+    'tenants': [
+        FieldSchema('unit_no', 'id', required=True),
+        FieldSchema('name', 'text', required=True),
+        FieldSchema('id', 'id'),
+        FieldSchema('mobile', 'id'),
+        FieldSchema('start_date', 'date'),
+        FieldSchema('end_date', 'date'),
+        FieldSchema('rent', 'number'),
+        FieldSchema('email', 'text'),
+        FieldSchema('notes', 'text'),
+    ],
+    'rents_paid': [
+        FieldSchema('unit_no', 'id', required=True),
+        FieldSchema('month', 'text', required=True),
+        FieldSchema('year', 'integer', required=True),
+        FieldSchema('amount', 'number', required=True),
+        FieldSchema('date', 'date'),
+        FieldSchema('method', 'text', choices=PAYMENT_METHODS),
+        FieldSchema('status', 'text', required=True, choices=RENT_STATUSES),
+        FieldSchema('notes', 'text'),
+    ],
+    'expenses': [
+        FieldSchema('building', 'text', required=True),
+        FieldSchema('date', 'date', required=True),
+        FieldSchema('type', 'text'),
+        FieldSchema('amount', 'number', required=True),
+        FieldSchema('category', 'text'),
+        FieldSchema('notes', 'text'),
+    ],
+}
+
+_DATE_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+
+def _is_date(value: Any) -> bool:
+    match = _DATE_PATTERN.fullmatch(value) if isinstance(value, str) else None
+    if match is None:
+        return False
+    try:
+        date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return False
+    return True
+
+
+# kind -> (type check, description used in error messages)
+_KIND_CHECKS: Dict[str, Tuple[Callable[[Any], bool], str]] = {
+    'text': (lambda v: isinstance(v, str), 'text'),
+    'integer': (lambda v: isinstance(v, int) and not isinstance(v, bool), 'an integer'),
+    'number': (
+        lambda v: isinstance(v, (int, float)) and not isinstance(v, bool), 'a number'
+    ),
+    'date': (_is_date, 'a date in YYYY-MM-DD format'),
+    'id': (lambda v: isinstance(v, str) or (isinstance(v, int) and not isinstance(v, bool)),
+           'text or an integer'),
+}
+
+
+def compile_validator(
+    fields: List[FieldSchema]
+) -> Callable[[Any], Optional[List[Tuple[str, str]]]]:
+    """
+    Compile a section schema into a record validator function.
+
+    The schema is resolved into a flat tuple of checks once, so validating
+    a record is a single loop with no schema lookups.
+
+    Args:
+        fields: Field schemas of the section
+
+    Returns:
+        Function taking a record and returning None if it is valid, or a
+        list of (field name, message) problems
+    """
+    checks = tuple(
+        (field.name, field.required, field.choices) + _KIND_CHECKS[field.kind]
+        for field in fields
+    )
+
+    def validate(record: Any) -> Optional[List[Tuple[str, str]]]:
+        if not isinstance(record, dict):
+            return [('', f"expected an object, got {type(record).__name__}")]
+
+        problems = None
+        for name, required, choices, is_valid, expected in checks:
+            value = record.get(name)
+            if value is None or value == '':
+                if required:
+                    problems = problems or []
+                    problems.append((name, "required field is missing or empty"))
+                    continue
+                if value is None or choices is None or value in choices:
+                    continue
+            if not is_valid(value):
+                problems = problems or []
+                problems.append(
+                    (name, f"expected {expected}, got {type(value).__name__} {value!r}")
+                )
+            elif choices is not None and value not in choices:
+                problems = problems or []
+                problems.append(
+                    (name, f"{value!r} is not one of: {', '.join(sorted(choices))}")
+                )
+        return problems
+
+    return validate
+
+
+SECTION_VALIDATORS = {key: compile_validator(fields) for key, fields in CONFIG_SCHEMA.items()}
+
+
+class ValidationIssue(NamedTuple):
+    """
+    A schema violation in a config record.
+
+    Attributes:
+        path: JSON path of the offending value, e.g. $.rents_paid[3].amount
+        row: Worksheet row the record is written to
+        message: Description of the problem
+    """
+    path: str
+    row: int
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path} (row {self.row}): {self.message}"
+
+
+class ConfigValidationError(ValueError):
+    """Raised when config records do not match CONFIG_SCHEMA."""
+
+    # Issues listed in the message; the rest are summarised
+    MAX_LISTED = 50
+
+    def __init__(self, issues: List[ValidationIssue]) -> None:
+        self.issues = issues
+        lines = [str(issue) for issue in issues[:self.MAX_LISTED]]
+        if len(issues) > self.MAX_LISTED:
+            lines.append(f"... and {len(issues) - self.MAX_LISTED} more")
+        super().__init__(
+            f"Configuration has {len(issues)} invalid value(s):\n  " + "\n  ".join(lines)
+        )
+
+
+class ConfigValidator:
+    """
+    Validates config records as they stream into the sheet builders.
+
+    Records are checked by the precompiled SECTION_VALIDATORS while the
+    sheets are being built, so validation needs no extra pass over the data.
+
+    Attributes:
+        fail_fast: Raise on the first invalid record instead of collecting all
+        issues: Problems found so far
+    """
+
+    def __init__(self, fail_fast: bool = False) -> None:
+        self.fail_fast = fail_fast
+        self.issues: List[ValidationIssue] = []
+
+    def stream(self, key: str, records: Any) -> Iterator[Any]:
+        """
+        Yield the valid records of a config section.
+
+        Invalid records are recorded in issues and skipped, so the sheet
+        builders never see them; check() then reports them all at once.
+        A section that is not a list is reported as a whole.
+
+        Args:
+            key: Config section name
+            records: Records of the section
+
+        Raises:
+            ConfigValidationError: On the first invalid record, if fail_fast
+        """
+        if not isinstance(records, (list, SpilledRecords)):
+            self.issues.append(ValidationIssue(
+                f"$.{key}", 1, f"expected a list of records, got {type(records).__name__}"
+            ))
+            if self.fail_fast:
+                raise ConfigValidationError(self.issues)
+            return
+
+        validate = SECTION_VALIDATORS[key]
+        for index, record in enumerate(records):
+            problems = validate(record)
+            if problems:
+                for name, message in problems:
+                    path = f"$.{key}[{index}]" + (f".{name}" if name else '')
+                    self.issues.append(ValidationIssue(path, index + 2, message))
+                if self.fail_fast:
+                    raise ConfigValidationError(self.issues)
+                continue
+            yield record
+
+    def check(self) -> None:
+        """
+        Raise if any invalid records were seen.
+
+        Raises:
+            ConfigValidationError: If issues were collected
+        """
+        if self.issues:
+            raise ConfigValidationError(self.issues)
+
+
+class SheetSpec(NamedTuple):
+    """
+    Layout of one generated sheet.
+
+    Attributes:
+        title: Sheet name
+        headers: Column headers, in column order
+        to_row: Converts a config record into the row's cell values
+        row_fill: Returns the background color for a record's row, if any
+    """
+    title: str
+    headers: List[str]
+    to_row: Callable[[Dict[str, Any]], List[Any]]
+    row_fill: Optional[Callable[[Dict[str, Any]], Optional[str]]] = None
+
+
+class SheetWriter(abc.ABC):
+    """
+    Destination for the rows of one sheet.
+
+    Rows arrive already converted by SheetSpec.to_row, so several writers
+    can share a single pass over the records.
+    """
+
+    @abc.abstractmethod
+    def write_row(self, values: List[Any], bg_color: Optional[str]) -> None:
+        """Write one converted row; bg_color is the row fill, if any."""
+
+    def close(self) -> None:
+        """Finish the sheet."""
+
+
+class XlsxSheetWriter(SheetWriter):
+    """
+    Writes rows to a styled worksheet.
+
+    Each distinct row style is built once with set_cell_style and then
+    copied onto the remaining cells, which avoids constructing and
+    deduplicating font/border objects per cell. In a write-only workbook
+    rows are appended as they are produced and streamed to a temporary
+    file by openpyxl.
+    """
+
+    def __init__(self, wb: Workbook, spec: SheetSpec) -> None:
+        self.spec = spec
+        self.sheet = wb.create_sheet(spec.title)
+        self.streaming = wb.write_only
+        self._row_num = 1
+        # Styles are keyed by fill and value type, since openpyxl picks
+        # the number format (e.g. for dates) from the type of the value
+        self._styles: Dict[Tuple[Optional[str], type], StyleArray] = {}
+
+        # Column settings must precede the first row in write-only mode
+        for col_num in range(1, len(spec.headers) + 1):
+            self.sheet.column_dimensions[get_column_letter(col_num)].width = 15
+
+        # Write headers
+        header_cells = []
+        for col_num, header in enumerate(spec.headers, 1):
+            if self.streaming:
+                cell = WriteOnlyCell(self.sheet, header)
+            else:
+                cell = self.sheet.cell(row=1, column=col_num, value=header)
+            set_cell_style(cell, bold=True, bg_color="C0C0C0")
+            header_cells.append(cell)
+        if self.streaming:
+            self.sheet.append(header_cells)
+
+    def write_row(self, values: List[Any], bg_color: Optional[str]) -> None:
+        self._row_num += 1
+        row_cells: List[Any] = []
+
+        for col_num, value in enumerate(values, 1):
+            if self.streaming:
+                cell = WriteOnlyCell(self.sheet, value)
+                row_cells.append(cell)
+            else:
+                cell = self.sheet.cell(row=self._row_num, column=col_num, value=value)
+            style_key = (bg_color, type(value))
+            style = self._styles.get(style_key)
+            if style is None:
+                set_cell_style(cell, bg_color=bg_color)
+                self._styles[style_key] = copy(cell._style)
+            else:
+                cell._style = copy(style)
+
+        if self.streaming:
+            self.sheet.append(row_cells)
+
+
+class _FileSheetWriter(SheetWriter):
+    """
+    Writes one sheet to its own file, via a temporary '.part' file.
+
+    The file only appears under its final name once commit() is called,
+    so a failed run leaves no partial exports behind.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.part_path = path.with_name(path.name + '.part')
+
+    def commit(self) -> None:
+        """Move the finished file into place."""
+        os.replace(self.part_path, self.path)
+
+    def discard(self) -> None:
+        """Close and delete the temporary file."""
+        self.close()
+        if self.part_path.exists():
+            self.part_path.unlink()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class CsvSheetWriter(_FileSheetWriter):
+    """Writes a sheet as a UTF-8 CSV file with the sheet's Arabic headers."""
+
+    def __init__(self, path: Path, spec: SheetSpec) -> None:
+        super().__init__(path)
+        self._file = open(self.part_path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(spec.headers)
+
+    def write_row(self, values: List[Any], bg_color: Optional[str]) -> None:
+        self._writer.writerow([_csv_value(value) for value in values])
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _optional(convert: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    return lambda value: None if value is None or value == '' else convert(value)
+
+
+class ParquetSheetWriter(_FileSheetWriter):
+    """
+    Writes a sheet as a typed Parquet file, in row groups.
+
+    Columns are named after the config fields and typed from CONFIG_SCHEMA,
+    so numbers and dates keep their types. Requires pyarrow.
+    """
+
+    # Rows buffered before a row group is written
+    ROW_GROUP_SIZE = 65536
+
+    def __init__(self, path: Path, fields: List[FieldSchema]) -> None:
+        # Imported here so runs without Parquet don't pay for loading pyarrow
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow") from None
+        self._table = pa.table
+        super().__init__(path)
+        arrow_types = {
+            'text': (pa.string(), _optional(str)),
+            'id': (pa.string(), _optional(str)),
+            'integer': (pa.int64(), _optional(int)),
+            'number': (pa.float64(), _optional(float)),
+            'date': (pa.date32(), _optional(lambda value: value)),
+        }
+        self._schema = pa.schema([(field.name, arrow_types[field.kind][0]) for field in fields])
+        self._converters = [arrow_types[field.kind][1] for field in fields]
+        self._columns: List[List[Any]] = [[] for _ in fields]
+        self._writer = None
+        try:
+            self._writer = pq.ParquetWriter(str(self.part_path), self._schema)
+        except BaseException:
+            # The caller never gets this writer, so it can't discard it
+            self.discard()
+            raise
+
+    def write_row(self, values: List[Any], bg_color: Optional[str]) -> None:
+        for column, convert, value in zip(self._columns, self._converters, values):
+            column.append(convert(value))
+        if len(self._columns[0]) >= self.ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._columns[0]:
+            self._writer.write_table(self._table(self._columns, schema=self._schema))
+            self._columns = [[] for _ in self._columns]
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._flush()
+            self._writer.close()
+            self._writer = None
+
+
+def export_section(
+    spec: SheetSpec,
+    records: Iterable[Dict[str, Any]],
+    writers: List[SheetWriter]
+) -> None:
+    """
+    Convert each record once and send the row to every writer.
+
+    Args:
+        spec: Layout of the sheet
+        records: Record dictionaries, e.g. a list or SpilledRecords
+        writers: Destinations for the rows; they are closed at the end
+    """
+    to_row, row_fill = spec.to_row, spec.row_fill
+    for record in records:
+        values = to_row(record)
+        bg_color = row_fill(record) if row_fill else None
+        for writer in writers:
+            writer.write_row(values, bg_color)
+
+    for writer in writers:
+        writer.close()
+
+
+def _write_sheet(wb: Workbook, spec: SheetSpec, records: Iterable[Dict[str, Any]]) -> None:
+    """
+    Create a styled sheet from config records.
+
+    Args:
+        wb: Workbook object (regular or write-only)
+        spec: Layout of the sheet
+        records: Record dictionaries, e.g. a list or SpilledRecords
+    """
+    export_section(spec, records, [XlsxSheetWriter(wb, spec)])
+
+
+def _building_row(building: Dict[str, Any]) -> List[Any]:
+    return [building.get('name', ''), building.get('units', 0), building.get('notes', '')]
+
+
+def _unit_row(unit: Dict[str, Any]) -> List[Any]:
+    return [
+        unit.get('unit_no', ''),
+        unit.get('building', ''),
+        unit.get('type', ''),
+        unit.get('rent', 0),
+        unit.get('status', ''),
+        unit.get('notes', ''),
+    ]
+
+
+def _tenant_row(tenant: Dict[str, Any]) -> List[Any]:
+    return [
+        tenant.get('unit_no', ''),
+        tenant.get('name', ''),
+        tenant.get('id', ''),
+        tenant.get('mobile', ''),
+        parse_date(tenant.get('start_date')),
+        parse_date(tenant.get('end_date')),
+        tenant.get('rent', 0),
+        tenant.get('email', ''),
+        tenant.get('notes', ''),
+    ]
+
+
+def _rent_row(rent: Dict[str, Any]) -> List[Any]:
+    return [
+        rent.get('unit_no', ''),
+        rent.get('month', ''),
+        rent.get('year', 0),
+        rent.get('amount', 0),
+        parse_date(rent.get('date')),
+        rent.get('method', ''),
+        rent.get('status', ''),
+        rent.get('notes', ''),
+    ]
+
+
+def _rent_fill(rent: Dict[str, Any]) -> Optional[str]:
+    # Highlight unpaid rents
+    return "FFC7CE" if rent.get('status', '') == "غير مدفوع" else None
+
+
+def _expense_row(expense: Dict[str, Any]) -> List[Any]:
+    return [
+        expense.get('building', ''),
+        parse_date(expense.get('date')),
+        expense.get('type', ''),
+        expense.get('amount', 0),
+        expense.get('category', ''),
+        expense.get('notes', ''),
+    ]
+
+
+BUILDINGS_SHEET = SheetSpec(
+    title='العمارات',
+    headers=['اسم العمارة', 'عدد الوحدات', 'ملاحظات'],
+    to_row=_building_row,
+)
+
+UNITS_SHEET = SheetSpec(
+    title='الوحدات',
+    headers=['رقم الوحدة', 'العمارة', 'التصنيف', 'الإيجار الشهري', 'الحالة', 'ملاحظات'],
+    to_row=_unit_row,
+)
+
+TENANTS_SHEET = SheetSpec(
+    title='المستأجرين',
+    headers=[
+        'رقم الوحدة', 'اسم المستأجر', 'رقم الهوية', 'رقم الجوال',
+        'تاريخ بداية العقد', 'تاريخ نهاية العقد', 'قيمة الإيجار',
+        'البريد الإلكتروني', 'ملاحظات'
+    ],
+    to_row=_tenant_row,
+)
+
+RENTS_SHEET = SheetSpec(
+    title='الإيجارات',
+    headers=[
+        'رقم الوحدة', 'الشهر', 'السنة', 'قيمة الإيجار',
+        'تاريخ الدفع', 'طريقة الدفع', 'الحالة', 'ملاحظات'
+    ],
+    to_row=_rent_row,
+    row_fill=_rent_fill,
+)
+
+EXPENSES_SHEET = SheetSpec(
+    title='المصروفات',
+    headers=['العمارة', 'التاريخ', 'نوع المصروفات', 'القيمة', 'الفئة', 'ملاحظات'],
+    to_row=_expense_row,
+)
+
+
 def create_buildings_sheet(wb: Workbook, buildings: List[Dict[str, Any]]) -> None:
     """
     Create the buildings sheet.
@@ -107,24 +969,7 @@ def create_buildings_sheet(wb: Workbook, buildings: List[Dict[str, Any]]) -> Non
         wb: Workbook object
         buildings: List of building dictionaries
     """
-    sheet = wb.create_sheet('العمارات')
-    headers = ['اسم العمارة', 'عدد الوحدات', 'ملاحظات']
-
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = sheet.cell(row=1, column=col_num)
-        cell.value = header
-        set_cell_style(cell, bold=True, bg_color="C0C0C0")
-        sheet.column_dimensions[get_column_letter(col_num)].width = 15
-
-    # Write data
-    for row_num, building in enumerate(buildings, 2):
-        sheet.cell(row=row_num, column=1).value = building.get('name', '')
-        sheet.cell(row=row_num, column=2).value = building.get('units', 0)
-        sheet.cell(row=row_num, column=3).value = building.get('notes', '')
-
-        for col_num in range(1, 4):
-            set_cell_style(sheet.cell(row=row_num, column=col_num))
+    _write_sheet(wb, BUILDINGS_SHEET, buildings)
 
 
 def create_units_sheet(wb: Workbook, units: List[Dict[str, Any]]) -> None:
@@ -135,27 +980,7 @@ def create_units_sheet(wb: Workbook, units: List[Dict[str, Any]]) -> None:
         wb: Workbook object
         units: List of unit dictionaries
     """
-    sheet = wb.create_sheet('الوحدات')
-    headers = ['رقم الوحدة', 'العمارة', 'التصنيف', 'الإيجار الشهري', 'الحالة', 'ملاحظات']
-
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = sheet.cell(row=1, column=col_num)
-        cell.value = header
-        set_cell_style(cell, bold=True, bg_color="C0C0C0")
-        sheet.column_dimensions[get_column_letter(col_num)].width = 15
-
-    # Write data
-    for row_num, unit in enumerate(units, 2):
-        sheet.cell(row=row_num, column=1).value = unit.get('unit_no', '')
-        sheet.cell(row=row_num, column=2).value = unit.get('building', '')
-        sheet.cell(row=row_num, column=3).value = unit.get('type', '')
-        sheet.cell(row=row_num, column=4).value = unit.get('rent', 0)
-        sheet.cell(row=row_num, column=5).value = unit.get('status', '')
-        sheet.cell(row=row_num, column=6).value = unit.get('notes', '')
-
-        for col_num in range(1, 7):
-            set_cell_style(sheet.cell(row=row_num, column=col_num))
+    _write_sheet(wb, UNITS_SHEET, units)
 
 
 def create_tenants_sheet(wb: Workbook, tenants: List[Dict[str, Any]]) -> None:
@@ -166,34 +991,7 @@ def create_tenants_sheet(wb: Workbook, tenants: List[Dict[str, Any]]) -> None:
         wb: Workbook object
         tenants: List of tenant dictionaries
     """
-    sheet = wb.create_sheet('المستأجرين')
-    headers = [
-        'رقم الوحدة', 'اسم المستأجر', 'رقم الهوية', 'رقم الجوال',
-        'تاريخ بداية العقد', 'تاريخ نهاية العقد', 'قيمة الإيجار',
-        'البريد الإلكتروني', 'ملاحظات'
-    ]
-
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = sheet.cell(row=1, column=col_num)
-        cell.value = header
-        set_cell_style(cell, bold=True, bg_color="C0C0C0")
-        sheet.column_dimensions[get_column_letter(col_num)].width = 15
-
-    # Write data
-    for row_num, tenant in enumerate(tenants, 2):
-        sheet.cell(row=row_num, column=1).value = tenant.get('unit_no', '')
-        sheet.cell(row=row_num, column=2).value = tenant.get('name', '')
-        sheet.cell(row=row_num, column=3).value = tenant.get('id', '')
-        sheet.cell(row=row_num, column=4).value = tenant.get('mobile', '')
-        sheet.cell(row=row_num, column=5).value = parse_date(tenant.get('start_date'))
-        sheet.cell(row=row_num, column=6).value = parse_date(tenant.get('end_date'))
-        sheet.cell(row=row_num, column=7).value = tenant.get('rent', 0)
-        sheet.cell(row=row_num, column=8).value = tenant.get('email', '')
-        sheet.cell(row=row_num, column=9).value = tenant.get('notes', '')
-
-        for col_num in range(1, 10):
-            set_cell_style(sheet.cell(row=row_num, column=col_num))
+    _write_sheet(wb, TENANTS_SHEET, tenants)
 
 
 def create_rents_sheet(wb: Workbook, rents: List[Dict[str, Any]]) -> None:
@@ -204,36 +1002,7 @@ def create_rents_sheet(wb: Workbook, rents: List[Dict[str, Any]]) -> None:
         wb: Workbook object
         rents: List of rent payment dictionaries
     """
-    sheet = wb.create_sheet('الإيجارات')
-    headers = [
-        'رقم الوحدة', 'الشهر', 'السنة', 'قيمة الإيجار',
-        'تاريخ الدفع', 'طريقة الدفع', 'الحالة', 'ملاحظات'
-    ]
-
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = sheet.cell(row=1, column=col_num)
-        cell.value = header
-        set_cell_style(cell, bold=True, bg_color="C0C0C0")
-        sheet.column_dimensions[get_column_letter(col_num)].width = 15
-
-    # Write data
-    for row_num, rent in enumerate(rents, 2):
-        sheet.cell(row=row_num, column=1).value = rent.get('unit_no', '')
-        sheet.cell(row=row_num, column=2).value = rent.get('month', '')
-        sheet.cell(row=row_num, column=3).value = rent.get('year', 0)
-        sheet.cell(row=row_num, column=4).value = rent.get('amount', 0)
-        sheet.cell(row=row_num, column=5).value = parse_date(rent.get('date'))
-        sheet.cell(row=row_num, column=6).value = rent.get('method', '')
-        sheet.cell(row=row_num, column=7).value = rent.get('status', '')
-        sheet.cell(row=row_num, column=8).value = rent.get('notes', '')
-
-        # Apply conditional formatting for unpaid rents
-        status = rent.get('status', '')
-        bg_color = "FFC7CE" if status == "غير مدفوع" else None
-
-        for col_num in range(1, 9):
-            set_cell_style(sheet.cell(row=row_num, column=col_num), bg_color=bg_color)
+    _write_sheet(wb, RENTS_SHEET, rents)
 
 
 def create_expenses_sheet(wb: Workbook, expenses: List[Dict[str, Any]]) -> None:
@@ -244,40 +1013,69 @@ def create_expenses_sheet(wb: Workbook, expenses: List[Dict[str, Any]]) -> None:
         wb: Workbook object
         expenses: List of expense dictionaries
     """
-    sheet = wb.create_sheet('المصروفات')
-    headers = ['العمارة', 'التاريخ', 'نوع المصروفات', 'القيمة', 'الفئة', 'ملاحظات']
+    _write_sheet(wb, EXPENSES_SHEET, expenses)
+
 
-    # Write headers
-    for col_num, header in enumerate(headers, 1):
-        cell = sheet.cell(row=1, column=col_num)
-        cell.value = header
-        set_cell_style(cell, bold=True, bg_color="C0C0C0")
-        sheet.column_dimensions[get_column_letter(col_num)].width = 15
+# Config section -> (sheet title, sheet builder), in workbook order
+SHEET_SECTIONS: List[Tuple[str, str, Callable[[Workbook, List[Dict[str, Any]]], None]]] = [
+    ('buildings', BUILDINGS_SHEET.title, create_buildings_sheet),
+    ('units', UNITS_SHEET.title, create_units_sheet),
+    ('tenants', TENANTS_SHEET.title, create_tenants_sheet),
+    ('rents_paid', RENTS_SHEET.title, create_rents_sheet),
+    ('expenses', EXPENSES_SHEET.title, create_expenses_sheet),
+]
 
-    # Write data
-    for row_num, expense in enumerate(expenses, 2):
-        sheet.cell(row=row_num, column=1).value = expense.get('building', '')
-        sheet.cell(row=row_num, column=2).value = parse_date(expense.get('date'))
-        sheet.cell(row=row_num, column=3).value = expense.get('type', '')
-        sheet.cell(row=row_num, column=4).value = expense.get('amount', 0)
-        sheet.cell(row=row_num, column=5).value = expense.get('category', '')
-        sheet.cell(row=row_num, column=6).value = expense.get('notes', '')
+_SECTION_SHEETS = {
+    'buildings': BUILDINGS_SHEET,
+    'units': UNITS_SHEET,
+    'tenants': TENANTS_SHEET,
+    'rents_paid': RENTS_SHEET,
+    'expenses': EXPENSES_SHEET,
+}
 
-        for col_num in range(1, 7):
-            set_cell_style(sheet.cell(row=row_num, column=col_num))
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
 
 
-def generate_excel(config: Dict[str, Any], output_path: Path) -> None:
+def _section_records(
+    config: Dict[str, Any],
+    key: str,
+    validator: Optional[ConfigValidator]
+) -> Iterable[Dict[str, Any]]:
+    """Return a section's records, validated on the fly if a validator is given."""
+    records = config.get(key, [])
+    return validator.stream(key, records) if validator else records
+
+
+def validate_config(config: Dict[str, Any], validator: ConfigValidator) -> None:
     """
-    Generate Excel file from configuration data.
+    Validate every record section of a configuration up front.
 
     Args:
-        config: Configuration dictionary with all data
-        output_path: Path where Excel file will be saved
+        config: Configuration dictionary
+        validator: Validator collecting the issues
 
     Raises:
-        PermissionError: If unable to write to output path
-        KeyError: If required keys missing from config
+        ConfigValidationError: If any records are invalid
+    """
+    for key in CONFIG_SECTIONS:
+        for _ in validator.stream(key, config.get(key, [])):
+            pass
+    validator.check()
+
+
+def build_workbook(
+    config: Dict[str, Any],
+    validator: Optional[ConfigValidator] = None
+) -> Workbook:
+    """
+    Build the in-memory workbook for a configuration.
+
+    Args:
+        config: Configuration dictionary with all data
+        validator: Optional validator run over the records while they are written
+
+    Returns:
+        Workbook containing one sheet per config section
     """
     # Create workbook
     wb = openpyxl.Workbook()
@@ -287,22 +1085,972 @@ def generate_excel(config: Dict[str, Any], output_path: Path) -> None:
         del wb['Sheet']
 
     # Create all sheets
-    create_buildings_sheet(wb, config.get('buildings', []))
-    create_units_sheet(wb, config.get('units', []))
-    create_tenants_sheet(wb, config.get('tenants', []))
-    create_rents_sheet(wb, config.get('rents_paid', []))
-    create_expenses_sheet(wb, config.get('expenses', []))
+    for key, _, builder in SHEET_SECTIONS:
+        builder(wb, _section_records(config, key, validator))
+
+    return wb
+
+
+# Zip settings of the xlsx container: (compression method, deflate level)
+COMPRESSION_LEVELS: Dict[str, Tuple[int, Optional[int]]] = {
+    'store': (zipfile.ZIP_STORED, None),
+    'fast': (zipfile.ZIP_DEFLATED, 1),
+    'default': (zipfile.ZIP_DEFLATED, None),
+    'max': (zipfile.ZIP_DEFLATED, 9),
+}
+
+
+class _SheetCachingWriter(ExcelWriter):
+    """
+    ExcelWriter that reuses the XML of worksheets serialized by an earlier save.
+
+    Serializing sheet XML is most of the cost of a save, so a workbook that
+    is saved repeatedly with only some sheets rebuilt (watch mode) only pays
+    for the rebuilt ones. Rebuilt sheets are new Worksheet objects and so
+    miss the cache, and are written by ExcelWriter as usual. save_workbook
+    fills the cache after the save.
+    """
+
+    def __init__(self, workbook: Workbook, archive: zipfile.ZipFile,
+                 sheet_xml: Dict[Worksheet, bytes]) -> None:
+        super().__init__(workbook, archive)
+        self.sheet_xml = sheet_xml
+
+    def write_worksheet(self, ws: Worksheet) -> None:
+        xml = self.sheet_xml.get(ws)
+        if xml is None:
+            super().write_worksheet(ws)
+            return
+        self._archive.writestr(ws.path[1:], xml)
+        self.manifest.append(ws)
+
+
+def _cache_sheet_xml(output_path: Path, wb: Workbook, sheet_xml: Dict[Worksheet, bytes]) -> None:
+    """
+    Store the XML of newly saved sheets for the next save of the workbook.
+
+    Only plain sheets are cached: a sheet with a relationships part
+    (charts, images, hyperlinks, comments, tables) is serialized again on
+    every save, since its related parts are numbered per save.
 
-    # Save workbook
+    Args:
+        output_path: The saved workbook
+        wb: Workbook that was saved
+        sheet_xml: Cache of serialized sheets, updated in place
+    """
+    with zipfile.ZipFile(output_path) as archive:
+        names = set(archive.namelist())
+        for ws in wb.worksheets:
+            if ws in sheet_xml or get_rels_path(ws.path)[1:] in names:
+                continue
+            sheet_xml[ws] = archive.read(ws.path[1:])
+
+
+def save_workbook(
+    wb: Workbook,
+    output_path: Path,
+    compression: str = 'default',
+    sheet_xml: Optional[Dict[Worksheet, bytes]] = None
+) -> None:
+    """
+    Save a workbook to disk.
+
+    This mirrors Workbook.save, but opens the zip container itself so that
+    its compression can be chosen.
+
+    Args:
+        wb: Workbook object
+        output_path: Path where Excel file will be saved
+        compression: One of COMPRESSION_LEVELS: 'store' writes the parts
+            uncompressed, 'fast' and 'max' use deflate levels 1 and 9, and
+            'default' keeps openpyxl's usual deflate settings
+        sheet_xml: Optional cache of serialized sheets, kept by the caller
+            between saves of the same workbook; sheets still in the cache
+            are not serialized again, so a sheet must be replaced rather
+            than edited in place once it has been saved
+
+    Raises:
+        PermissionError: If unable to write to output path
+    """
+    method, level = COMPRESSION_LEVELS[compression]
     try:
-        wb.save(output_path)
-        print(f"✓ Excel file generated successfully: {output_path}")
+        archive = zipfile.ZipFile(output_path, 'w', method, allowZip64=True, compresslevel=level)
     except PermissionError:
         raise PermissionError(
             f"Unable to write to {output_path}. "
             f"Please close the file if it's open and try again."
         )
 
+    try:
+        wb.properties.modified = datetime.now(timezone.utc).replace(tzinfo=None)
+        if sheet_xml is None:
+            ExcelWriter(wb, archive).save()
+        else:
+            _SheetCachingWriter(wb, archive, sheet_xml).save()
+    finally:
+        archive.close()
+
+    if sheet_xml is not None:
+        # Forget sheets that have been replaced
+        for ws in [ws for ws in sheet_xml if ws not in wb.worksheets]:
+            del sheet_xml[ws]
+        if not wb.write_only:
+            _cache_sheet_xml(output_path, wb, sheet_xml)
+
+
+def parse_formats(text: str) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated list of export formats.
+
+    Args:
+        text: Formats such as "xlsx,csv,parquet"
+
+    Returns:
+        Requested formats, without duplicates, in EXPORT_FORMATS order
+
+    Raises:
+        ValueError: If a format is unknown or none is given
+    """
+    requested = {part.strip().lower() for part in text.split(',') if part.strip()}
+    unknown = requested - set(EXPORT_FORMATS)
+    if unknown or not requested:
+        raise ValueError(
+            f"Unknown export format(s): {', '.join(sorted(unknown)) or text!r}. "
+            f"Choose from: {', '.join(EXPORT_FORMATS)}"
+        )
+    return tuple(fmt for fmt in EXPORT_FORMATS if fmt in requested)
+
+
+def export_path(output_path: Path, title: str, extension: str) -> Path:
+    """
+    Return the path of a per-sheet export file next to the Excel output.
+
+    Args:
+        output_path: Excel output path the name is derived from
+        title: Sheet title
+        extension: File extension without the dot
+
+    Returns:
+        Path such as report.الإيجارات.csv for output report.xlsx
+    """
+    return output_path.with_name(f"{output_path.stem}.{title}.{extension}")
+
+
+def generate_excel(
+    config: Dict[str, Any],
+    output_path: Path,
+    budget: Optional[MemoryBudget] = None,
+    validator: Optional[ConfigValidator] = None,
+    formats: Tuple[str, ...] = ('xlsx',),
+    compression: str = 'default'
+) -> None:
+    """
+    Generate Excel file, and optionally CSV/Parquet exports, from configuration data.
+
+    Each section is read and converted once; the converted rows go to
+    every requested format in the same pass. CSV and Parquet produce one
+    file per sheet, named after output_path (see export_path).
+
+    Under a memory budget generate_excel takes ownership of config: each
+    section is popped from it once its sheet is written, and unwritten
+    sections may be replaced by spilled copies. The caller must not keep
+    other references to the record lists, or their memory is not freed.
+
+    Args:
+        config: Configuration dictionary with all data; emptied of its
+            sections when a budget is given
+        output_path: Path where Excel file will be saved
+        budget: Optional memory budget; when given the workbook is streamed
+            and large sections of config may be spilled to disk
+        validator: Optional validator; records are checked while the sheets
+            are built and nothing is saved if any are invalid
+        formats: Output formats, any of EXPORT_FORMATS (default: xlsx only)
+        compression: Zip compression of the xlsx file, see COMPRESSION_LEVELS
+
+    Raises:
+        PermissionError: If unable to write to output path
+        KeyError: If required keys missing from config
+        ConfigValidationError: If the validator found invalid records
+        ImportError: If parquet is requested and pyarrow is not installed
+    """
+    wb = None
+    if 'xlsx' in formats:
+        # Sheet XML is streamed to temporary files under a memory budget
+        wb = openpyxl.Workbook(write_only=budget is not None)
+        if 'Sheet' in wb.sheetnames:
+            del wb['Sheet']
+
+    spilled: List[SpilledRecords] = []
+    file_writers: List[_FileSheetWriter] = []
+    try:
+        for key, spec in _SECTION_SHEETS.items():
+            if budget is not None and budget.exceeded():
+                spilled.extend(config[name] for name in spill_sections(config, budget))
+
+            writers: List[SheetWriter] = []
+            if wb is not None:
+                writers.append(XlsxSheetWriter(wb, spec))
+            if 'csv' in formats:
+                file_writers.append(CsvSheetWriter(export_path(output_path, spec.title, 'csv'), spec))
+                writers.append(file_writers[-1])
+            if 'parquet' in formats:
+                file_writers.append(ParquetSheetWriter(
+                    export_path(output_path, spec.title, 'parquet'), CONFIG_SCHEMA[key]
+                ))
+                writers.append(file_writers[-1])
+
+            export_section(spec, _section_records(config, key, validator), writers)
+            if budget is not None:
+                # Release the records now, rather than after the last sheet
+                config.pop(key, None)
+
+        if validator:
+            validator.check()
+        # Exports are only committed once the workbook is saved too
+        if wb is not None:
+            save_workbook(wb, output_path, compression)
+    except BaseException:
+        for writer in file_writers:
+            writer.discard()
+        raise
+    finally:
+        for records in spilled:
+            records.close()
+
+    for writer in file_writers:
+        writer.commit()
+    if wb is not None:
+        print(f"✓ Excel file generated successfully: {output_path}")
+    for fmt in formats:
+        if fmt != 'xlsx':
+            pattern = export_path(output_path, '*', fmt)
+            print(f"✓ {fmt.upper()} files generated successfully: {pattern}")
+
+    if budget is not None:
+        mb = 1024 * 1024
+        print(
+            f"  Peak memory: {budget.peak() / mb:.1f} MB of {budget.limit / mb:.1f} MB budget, "
+            f"spilled {budget.spilled_bytes / mb:.1f} MB to disk"
+        )
+        if budget.peak() > budget.limit:
+            print(
+                "Warning: peak memory exceeded the budget. Parsing the JSON config "
+                "happens before anything can be spilled; consider splitting it into shards.",
+                file=sys.stderr
+            )
+
+
+def regenerate_changed_sections(
+    wb: Workbook,
+    old_config: Dict[str, Any],
+    new_config: Dict[str, Any]
+) -> List[str]:
+    """
+    Rebuild only the sheets whose config section changed.
+
+    Unchanged sheets are left untouched; rebuilt sheets keep their
+    original position in the workbook.
+
+    Args:
+        wb: Workbook previously built from old_config
+        old_config: Configuration the workbook was built from
+        new_config: Updated configuration
+
+    Returns:
+        Config keys of the sections that were rebuilt
+    """
+    changed = []
+    for index, (key, title, builder) in enumerate(SHEET_SECTIONS):
+        records = new_config.get(key, [])
+        if title in wb.sheetnames and records == old_config.get(key, []):
+            continue
+
+        if title in wb.sheetnames:
+            del wb[title]
+        builder(wb, records)
+        wb.move_sheet(title, offset=index - wb.sheetnames.index(title))
+        changed.append(key)
+
+    return changed
+
+
+def _config_signature(config_path: Path) -> Optional[Tuple[Tuple[str, int, int], ...]]:
+    """
+    Return (name, mtime_ns, size) for every file of a config source.
+
+    Args:
+        config_path: Config file, shard directory or glob pattern
+
+    Returns:
+        Signature tuple, or None if the source currently has no files
+    """
+    try:
+        signature = []
+        for path in resolve_config_paths(config_path):
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    except FileNotFoundError:
+        return None
+    return tuple(signature)
+
+
+def watch_config(
+    config_path: Path,
+    output_path: Path,
+    interval: float = 0.5,
+    debounce: float = 0.3,
+    verbose: bool = False,
+    max_regenerations: Optional[int] = None,
+    compression: str = 'default',
+    validate: bool = True,
+    fail_fast: bool = False,
+    config: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Regenerate the Excel file whenever the configuration file changes.
+
+    The workbook is kept in memory between runs so that only the sheets
+    whose section changed are rebuilt, and the XML of the other sheets is
+    reused when saving. A burst of saves is collapsed into a single
+    regeneration once the file has been stable for `debounce` seconds.
+    Invalid intermediate saves are reported and skipped, leaving the last
+    good output in place. Ctrl+C stops watching.
+
+    Args:
+        config_path: Configuration file, shard directory or glob pattern to watch
+        output_path: Path where Excel file will be saved
+        interval: Polling interval in seconds (default: 0.5)
+        debounce: Quiet period in seconds before regenerating (default: 0.3)
+        verbose: Print the sections rebuilt on each run
+        max_regenerations: Stop after this many regenerations (default: run forever)
+        compression: Zip compression of the xlsx file, see COMPRESSION_LEVELS
+        validate: Check each loaded config against CONFIG_SCHEMA
+        fail_fast: Report only the first invalid record of a config
+        config: Configuration already loaded from config_path, so that it
+            is not parsed twice at startup (default: load it here)
+
+    Raises:
+        FileNotFoundError: If config file doesn't exist at startup
+        json.JSONDecodeError: If config file is invalid JSON at startup
+        ConfigValidationError: If the config is invalid at startup
+    """
+    def load() -> Dict[str, Any]:
+        return validated(load_config(config_path))
+
+    def validated(loaded: Dict[str, Any]) -> Dict[str, Any]:
+        if validate:
+            validate_config(loaded, ConfigValidator(fail_fast=fail_fast))
+        return loaded
+
+    # Snapshot before building so edits made during the first build are seen
+    signature = _config_signature(config_path)
+    config = load() if config is None else validated(config)
+    wb = build_workbook(config)
+    sheet_xml: Dict[Worksheet, bytes] = {}
+    save_workbook(wb, output_path, compression, sheet_xml)
+    print(f"✓ Excel file generated successfully: {output_path}")
+    print(f"Watching {config_path} for changes (Ctrl+C to stop)...")
+
+    regenerations = 0
+    try:
+        while max_regenerations is None or regenerations < max_regenerations:
+            time.sleep(interval)
+            current = _config_signature(config_path)
+            if current == signature:
+                continue
+
+            # Debounce: wait until the file stops changing
+            while True:
+                time.sleep(debounce)
+                settled = _config_signature(config_path)
+                if settled == current:
+                    break
+                current = settled
+            signature = current
+
+            started = time.perf_counter()
+            try:
+                new_config = load()
+                changed = regenerate_changed_sections(wb, config, new_config)
+                if changed:
+                    save_workbook(wb, output_path, compression, sheet_xml)
+            except Exception as e:
+                # A half-finished edit must not stop the watcher
+                print(f"Error: {e}", file=sys.stderr)
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            config = new_config
+            regenerations += 1
+            if not changed:
+                print(f"No section changes ({elapsed_ms:.0f} ms)")
+                continue
+            print(f"✓ Regenerated {output_path} in {elapsed_ms:.0f} ms")
+            if verbose:
+                print(f"  Rebuilt sections: {', '.join(changed)}")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+STATEMENT_TITLE = 'كشف حساب'
+
+# Contract details at the top of a statement: the leading tenant sheet columns
+_STATEMENT_CONTRACT_FIELDS = 7
+
+STATEMENT_TOTALS = ['إجمالي المستحق', 'إجمالي المدفوع', 'الرصيد المتبقي']
+
+
+# openpyxl internals used by _copy_workbook: the workbook's style tables
+# that cell StyleArrays index into, and its number format lookups
+_WORKBOOK_STYLE_TABLES = (
+    '_fonts', '_fills', '_borders', '_alignments', '_number_formats',
+    '_protections', '_cell_styles'
+)
+_WORKBOOK_FORMAT_MAPS = ('_date_formats', '_timedelta_formats')
+
+
+def _copy_workbook(source: Workbook) -> Workbook:
+    """
+    Copy a workbook with a single sheet of values, styles and column widths.
+
+    copy.deepcopy does not preserve openpyxl's IndexedList style tables, so
+    the tables are copied and the cells re-created with their StyleArrays.
+    This is the one place that relies on openpyxl internals (the attributes
+    above and Worksheet._cells); TestStatements checks them against the
+    installed openpyxl.
+
+    Args:
+        source: Workbook to copy
+
+    Returns:
+        New workbook that can be changed without affecting source
+    """
+    wb = openpyxl.Workbook()
+    for table in _WORKBOOK_STYLE_TABLES:
+        setattr(wb, table, IndexedList(getattr(source, table)))
+    for formats in _WORKBOOK_FORMAT_MAPS:
+        setattr(wb, formats, dict(getattr(source, formats)))
+
+    template, sheet = source.active, wb.active
+    sheet.title = template.title
+    for (row_num, col_num), source_cell in template._cells.items():
+        cell = sheet.cell(row=row_num, column=col_num, value=source_cell.value)
+        cell._style = copy(source_cell._style)
+    for letter, dimension in template.column_dimensions.items():
+        sheet.column_dimensions[letter].width = dimension.width
+    return wb
+
+
+class StatementTemplate:
+    """
+    Prebuilt tenant statement workbook, cloned and filled per tenant.
+
+    The contract labels, rent table headers, column widths and every cell
+    style a statement needs are created once. A statement is a clone of the
+    template with the tenant's values written into it; since the clone
+    starts from the template's style tables, its cells only need a copy of
+    a prebuilt StyleArray instead of going through set_cell_style.
+
+    Attributes:
+        workbook: Template workbook with a single statement sheet
+        first_rent_row: Row of the first rent below the table headers
+    """
+
+    def __init__(self) -> None:
+        self.workbook = openpyxl.Workbook()
+        sheet = self.workbook.active
+        sheet.title = STATEMENT_TITLE
+        rent_headers = RENTS_SHEET.headers[1:]
+
+        for col_num in range(1, len(rent_headers) + 1):
+            sheet.column_dimensions[get_column_letter(col_num)].width = 15
+
+        # Contract block: label in column A, tenant value in column B
+        for row_num, label in enumerate(TENANTS_SHEET.headers[:_STATEMENT_CONTRACT_FIELDS], 1):
+            set_cell_style(sheet.cell(row=row_num, column=1, value=label),
+                           bold=True, bg_color="C0C0C0")
+            set_cell_style(sheet.cell(row=row_num, column=2))
+
+        header_row = _STATEMENT_CONTRACT_FIELDS + 2
+        for col_num, header in enumerate(rent_headers, 1):
+            set_cell_style(sheet.cell(row=header_row, column=col_num, value=header),
+                           bold=True, bg_color="C0C0C0")
+        self.first_rent_row = header_row + 1
+
+        # Register the styles of the variable rows on a scratch cell that is
+        # not part of the sheet, keyed by fill and whether the value is a date
+        scratch = Cell(sheet)
+        self._styles: Dict[Tuple[Optional[str], bool], StyleArray] = {}
+        for bg_color in (None, _rent_fill({'status': 'غير مدفوع'})):
+            for value in ('', date(2000, 1, 1)):
+                scratch._style = StyleArray()
+                scratch.value = value
+                set_cell_style(scratch, bg_color=bg_color)
+                self._styles[(bg_color, isinstance(value, date))] = copy(scratch._style)
+        scratch._style = StyleArray()
+        set_cell_style(scratch, bold=True, bg_color="C0C0C0")
+        self._label_style = copy(scratch._style)
+
+    def fill(self, tenant: Dict[str, Any], rents: List[Dict[str, Any]]) -> Workbook:
+        """
+        Create one tenant's statement from the template.
+
+        Args:
+            tenant: Tenant record
+            rents: The tenant's rent records, in config order
+
+        Returns:
+            Statement workbook with contract details, rents and balance
+        """
+        wb = _copy_workbook(self.workbook)
+        sheet = wb.active
+
+        for row_num, value in enumerate(_tenant_row(tenant)[:_STATEMENT_CONTRACT_FIELDS], 1):
+            sheet.cell(row=row_num, column=2).value = value
+
+        row_num = self.first_rent_row
+        due = paid = 0
+        for rent in rents:
+            bg_color = _rent_fill(rent)
+            for col_num, value in enumerate(_rent_row(rent)[1:], 1):
+                cell = sheet.cell(row=row_num, column=col_num, value=value)
+                cell._style = copy(self._styles[(bg_color, isinstance(value, date))])
+            amount = rent.get('amount') or 0
+            due += amount
+            if rent.get('status') == 'مدفوع':
+                paid += amount
+            row_num += 1
+
+        value_style = self._styles[(None, False)]
+        for offset, (label, value) in enumerate(zip(STATEMENT_TOTALS, (due, paid, due - paid))):
+            label_cell = sheet.cell(row=row_num + 1 + offset, column=1, value=label)
+            label_cell._style = copy(self._label_style)
+            value_cell = sheet.cell(row=row_num + 1 + offset, column=2, value=value)
+            value_cell._style = copy(value_style)
+
+        return wb
+
+
+# Built on first use in each worker process
+_worker_template: Optional[StatementTemplate] = None
+
+
+def _write_statement(job: Tuple[Dict[str, Any], List[Dict[str, Any]], Path, str]) -> None:
+    global _worker_template
+    if _worker_template is None:
+        _worker_template = StatementTemplate()
+    tenant, rents, path, compression = job
+    save_workbook(_worker_template.fill(tenant, rents), path, compression)
+
+
+def _statement_path(output_dir: Path, tenant: Dict[str, Any], taken: set) -> Path:
+    # Named after the unit, made safe for file systems and unique
+    stem = re.sub(r'[\\/:*?"<>|\s]+', '_', str(tenant.get('unit_no', ''))).strip('_') or 'tenant'
+    name, suffix = stem, 2
+    while name in taken:
+        name, suffix = f"{stem}_{suffix}", suffix + 1
+    taken.add(name)
+    return output_dir / f"{name}.xlsx"
+
+
+# Month names used in rents_paid: Gregorian and Levantine forms
+MONTH_NUMBERS: Dict[str, int] = {
+    name: number
+    for names in (
+        ('يناير', 'فبراير', 'مارس', 'أبريل', 'مايو', 'يونيو',
+         'يوليو', 'أغسطس', 'سبتمبر', 'أكتوبر', 'نوفمبر', 'ديسمبر'),
+        ('كانون الثاني', 'شباط', 'آذار', 'نيسان', 'أيار', 'حزيران',
+         'تموز', 'آب', 'أيلول', 'تشرين الأول', 'تشرين الثاني', 'كانون الأول'),
+    )
+    for number, name in enumerate(names, 1)
+}
+
+
+def contract_rents(tenant: Dict[str, Any], rents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Select the rents of a unit that fall within a tenant's contract.
+
+    A rent's month and year are compared with the contract's start and end
+    months. Rents whose month is not a calendar month, such as an annual
+    payment, are placed by their payment date, or else by their year.
+    A missing contract date leaves that end of the contract open.
+
+    Args:
+        tenant: Tenant record with optional start_date and end_date
+        rents: Rent records of the tenant's unit
+
+    Returns:
+        The rents belonging to this tenant, in their original order
+    """
+    start = parse_date(tenant.get('start_date'))
+    end = parse_date(tenant.get('end_date'))
+    if start is None and end is None:
+        return list(rents)
+
+    selected = []
+    for rent in rents:
+        month = MONTH_NUMBERS.get(str(rent.get('month', '')).strip())
+        year = rent.get('year')
+        paid_on = parse_date(rent.get('date'))
+        if month is not None and isinstance(year, int):
+            period: Any = (year, month)
+            first = (start.year, start.month) if start else None
+            last = (end.year, end.month) if end else None
+        elif paid_on is not None:
+            period, first, last = paid_on, start, end
+        elif isinstance(year, int):
+            period = year
+            first = start.year if start else None
+            last = end.year if end else None
+        else:
+            selected.append(rent)
+            continue
+        if (first is None or first <= period) and (last is None or period <= last):
+            selected.append(rent)
+    return selected
+
+
+def generate_statements(
+    config: Dict[str, Any],
+    output_dir: Path,
+    jobs: Optional[int] = None,
+    validator: Optional[ConfigValidator] = None,
+    compression: str = 'default'
+) -> int:
+    """
+    Write one statement workbook per tenant.
+
+    Rents are grouped by unit_no in a single pass, so each tenant's rows are
+    looked up instead of filtered from the whole config, and then limited
+    to the tenant's contract period (see contract_rents), so successive
+    tenants of a unit each get their own payments. Statements are filled
+    from a StatementTemplate and saved by a pool of worker processes.
+
+    Tenants and rents name only the unit_no, not the building. Tenants of
+    a unit_no that exists in more than one building are therefore skipped
+    with a warning, since their rents cannot be told apart.
+
+    Args:
+        config: Configuration dictionary with all data
+        output_dir: Directory for the statements, created if missing;
+            files are named after the tenant's unit_no
+        jobs: Number of worker processes (default: CPU count; 1 runs inline)
+        validator: Optional validator for the units, tenants and rents
+            sections; nothing is written if any records are invalid
+        compression: Zip compression of the statements, see COMPRESSION_LEVELS
+
+    Returns:
+        Number of statements written
+
+    Raises:
+        ConfigValidationError: If the validator found invalid records
+        PermissionError: If unable to write to output_dir
+    """
+    unit_buildings: Dict[str, set] = {}
+    for unit in _section_records(config, 'units', validator):
+        unit_buildings.setdefault(str(unit.get('unit_no', '')), set()).add(unit.get('building'))
+    rents_by_unit: Dict[str, List[Dict[str, Any]]] = {}
+    for rent in _section_records(config, 'rents_paid', validator):
+        rents_by_unit.setdefault(str(rent.get('unit_no', '')), []).append(rent)
+    tenants = list(_section_records(config, 'tenants', validator))
+    if validator:
+        validator.check()
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    taken: set = set()
+    work = []
+    ambiguous = []
+    for tenant in tenants:
+        unit_no = str(tenant.get('unit_no', ''))
+        if len(unit_buildings.get(unit_no, ())) > 1:
+            ambiguous.append(unit_no)
+            continue
+        rents = contract_rents(tenant, rents_by_unit.get(unit_no, []))
+        work.append((tenant, rents, _statement_path(output_dir, tenant, taken), compression))
+    if ambiguous:
+        print(
+            f"Warning: skipped {len(ambiguous)} tenant(s) of units numbered the same in "
+            f"several buildings: {', '.join(sorted(set(ambiguous)))}",
+            file=sys.stderr
+        )
+
+    workers = jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1 or len(work) < 2:
+        for job in work:
+            _write_statement(job)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Large chunks keep inter-process traffic low
+            chunksize = max(1, len(work) // (workers * 4))
+            list(executor.map(_write_statement, work, chunksize=chunksize))
+    elapsed = time.perf_counter() - started
+
+    rate = len(work) / elapsed if elapsed > 0 else 0.0
+    print(f"✓ {len(work)} statements generated in {elapsed:.2f} s "
+          f"({rate:.0f} statements/s): {output_dir}")
+    return len(work)
+
+
+# Natural key fields identifying a record across snapshots
+DIFF_KEYS: Dict[str, Tuple[str, ...]] = {
+    'buildings': ('name',),
+    'units': ('building', 'unit_no'),
+    'tenants': ('unit_no',),
+    'rents_paid': ('unit_no', 'year', 'month'),
+    'expenses': ('building', 'date', 'type'),
+}
+
+CHANGE_ADDED = 'جديد'
+CHANGE_REMOVED = 'محذوف'
+CHANGE_MODIFIED = 'معدّل'
+
+# Section -> field name -> column header; schema fields follow column order
+_FIELD_LABELS = {
+    key: dict(zip((field.name for field in CONFIG_SCHEMA[key]), spec.headers))
+    for key, spec in _SECTION_SHEETS.items()
+}
+
+
+def _normalize_value(value: Any) -> Any:
+    """Map config and worksheet representations of a value onto one form."""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class Snapshot:
+    """
+    Records of one portfolio snapshot, read from a config or a workbook.
+
+    Generated workbooks (.xlsx) are opened in read-only mode and their rows
+    are mapped back onto config field names. Config records go through the
+    same SheetSpec.to_row used to write the sheet, so defaults for missing
+    fields match, and a workbook compares equal to the config it was
+    generated from. Records are produced lazily, section by section.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._wb = None
+        self._config: Optional[Dict[str, Any]] = None
+        if path.suffix.lower() == '.xlsx':
+            if not path.exists():
+                raise FileNotFoundError(f"Workbook not found: {path}")
+            self._wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        else:
+            self._config = load_config(path)
+
+    def records(self, key: str) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the normalized records of a config section.
+
+        Args:
+            key: Config section name
+
+        Returns:
+            Iterator of records holding the section's schema fields
+        """
+        fields = [field.name for field in CONFIG_SCHEMA[key]]
+
+        spec = _SECTION_SHEETS[key]
+        if self._config is not None:
+            for record in self._config.get(key, []):
+                values = spec.to_row(record)
+                yield {name: _normalize_value(value) for name, value in zip(fields, values)}
+            return
+
+        title = spec.title
+        if title not in self._wb.sheetnames:
+            return
+        for row in self._wb[title].iter_rows(min_row=2, values_only=True):
+            if all(value is None for value in row):
+                continue
+            values = list(row[:len(fields)]) + [None] * (len(fields) - len(row))
+            yield {name: _normalize_value(value) for name, value in zip(fields, values)}
+
+    def close(self) -> None:
+        """Release the workbook, if one was opened."""
+        if self._wb is not None:
+            self._wb.close()
+
+
+class Change(NamedTuple):
+    """
+    One difference between two snapshots.
+
+    Attributes:
+        section: Config section name
+        kind: CHANGE_ADDED, CHANGE_REMOVED or CHANGE_MODIFIED
+        key: Natural key of the record
+        field: Changed field, or '' for added and removed records
+        old: Previous value (or record summary for removed records)
+        new: New value (or record summary for added records)
+    """
+    section: str
+    kind: str
+    key: Tuple[Any, ...]
+    field: str
+    old: Any
+    new: Any
+
+
+def _record_summary(section: str, record: Dict[str, Any]) -> str:
+    key_fields = DIFF_KEYS[section]
+    labels = _FIELD_LABELS[section]
+    return '، '.join(
+        f"{labels[name]}: {value}" for name, value in record.items()
+        if name not in key_fields and value != ''
+    )
+
+
+def _keyed_records(
+    records: Iterable[Dict[str, Any]],
+    key_fields: Tuple[str, ...]
+) -> Iterator[Tuple[Tuple[Any, ...], Dict[str, Any]]]:
+    """
+    Pair records with their natural key.
+
+    Records sharing a natural key get an occurrence number appended, so
+    duplicates are matched in order instead of overwriting each other.
+    """
+    seen: Dict[Tuple[Any, ...], int] = {}
+    for record in records:
+        key = tuple(record[name] for name in key_fields)
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        yield (key + (occurrence,) if occurrence else key), record
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> List[Change]:
+    """
+    Compare two snapshots with a hash join on each section's natural key.
+
+    The old snapshot is indexed in one pass and the new one is streamed
+    against that index in a second pass, so the work is linear in the total
+    number of records.
+
+    Args:
+        old: Previous snapshot
+        new: Current snapshot
+
+    Returns:
+        Changes in section order: modified and added records in the order of
+        the new snapshot, followed by removed records
+    """
+    changes: List[Change] = []
+    for key in CONFIG_SECTIONS:
+        key_fields = DIFF_KEYS[key]
+        previous = dict(_keyed_records(old.records(key), key_fields))
+
+        for record_key, record in _keyed_records(new.records(key), key_fields):
+            before = previous.pop(record_key, None)
+            if before is None:
+                changes.append(Change(
+                    key, CHANGE_ADDED, record_key, '', '', _record_summary(key, record)
+                ))
+            elif before != record:
+                for name, value in record.items():
+                    if before[name] != value:
+                        changes.append(Change(
+                            key, CHANGE_MODIFIED, record_key, name, before[name], value
+                        ))
+
+        for record_key, record in previous.items():
+            changes.append(Change(
+                key, CHANGE_REMOVED, record_key, '', _record_summary(key, record), ''
+            ))
+
+    return changes
+
+
+_CHANGE_FILLS = {CHANGE_ADDED: "C6EFCE", CHANGE_REMOVED: "FFC7CE", CHANGE_MODIFIED: "FFEB9C"}
+
+CHANGES_SHEET = SheetSpec(
+    title='التغييرات',
+    headers=['القسم', 'نوع التغيير', 'المفتاح', 'الحقل', 'القيمة السابقة', 'القيمة الجديدة'],
+    to_row=lambda change: [
+        _SECTION_SHEETS[change.section].title,
+        change.kind,
+        ' / '.join(str(part) for part in change.key),
+        _FIELD_LABELS[change.section].get(change.field, ''),
+        change.old,
+        change.new,
+    ],
+    row_fill=lambda change: _CHANGE_FILLS[change.kind],
+)
+
+SUMMARY_SHEET = SheetSpec(
+    title='ملخص التغييرات',
+    headers=['القسم', CHANGE_ADDED, CHANGE_REMOVED, CHANGE_MODIFIED],
+    to_row=lambda counts: counts,
+)
+
+
+def summarize_changes(changes: List[Change]) -> List[List[Any]]:
+    """
+    Count changed records per section and kind.
+
+    A modified record is counted once however many of its fields changed.
+
+    Args:
+        changes: Changes from diff_snapshots
+
+    Returns:
+        Rows of [section title, added, removed, modified]
+    """
+    counted = {(key, kind): set() for key in CONFIG_SECTIONS for kind in _CHANGE_FILLS}
+    for change in changes:
+        counted[(change.section, change.kind)].add(change.key)
+    return [
+        [_SECTION_SHEETS[key].title] + [len(counted[(key, kind)]) for kind in _CHANGE_FILLS]
+        for key in CONFIG_SECTIONS
+    ]
+
+
+def generate_diff(
+    old_path: Path,
+    new_path: Path,
+    output_path: Path,
+    compression: str = 'default'
+) -> List[Change]:
+    """
+    Write a styled workbook listing the changes between two snapshots.
+
+    Each snapshot may be a config (file, shard directory or glob) or a
+    workbook generated by this script.
+
+    Args:
+        old_path: Previous snapshot
+        new_path: Current snapshot
+        output_path: Path where the changes workbook will be saved
+        compression: Zip compression of the workbook, see COMPRESSION_LEVELS
+
+    Returns:
+        The changes found
+
+    Raises:
+        FileNotFoundError: If a snapshot doesn't exist
+        PermissionError: If unable to write to output path
+    """
+    old, new = Snapshot(old_path), Snapshot(new_path)
+    try:
+        changes = diff_snapshots(old, new)
+    finally:
+        old.close()
+        new.close()
+
+    wb = openpyxl.Workbook(write_only=True)
+    _write_sheet(wb, SUMMARY_SHEET, summarize_changes(changes))
+    _write_sheet(wb, CHANGES_SHEET, changes)
+    save_workbook(wb, output_path, compression)
+    print(f"✓ Changes workbook generated successfully: {output_path} ({len(changes)} changes)")
+    return changes
+
 
 def main() -> int:
     """
@@ -320,6 +2068,14 @@ Examples:
   %(prog)s -c myconfig.json          # Use custom config file
   %(prog)s -o output.xlsx            # Specify output filename
   %(prog)s -c data.json -o report.xlsx  # Custom config and output
+  %(prog)s -c buildings/             # Merge one JSON shard per building
+  %(prog)s -c 'buildings/*.json'     # Same, selecting shards with a glob
+  %(prog)s --watch                   # Regenerate whenever config.json changes
+  %(prog)s --max-memory 512M         # Stream and spill to disk to stay under 512 MB
+  %(prog)s --diff old.json new.json -o changes.xlsx  # Compare two snapshots
+  %(prog)s --formats xlsx,csv,parquet  # Also export CSV and Parquet files per sheet
+  %(prog)s --statements statements/ -j 8  # One statement workbook per tenant
+  %(prog)s --compression fast        # Faster save, larger file
 
 For configuration format, see config.example.json
         """
@@ -329,7 +2085,8 @@ For configuration format, see config.example.json
         '-c', '--config',
         type=Path,
         default=Path('config.json'),
-        help='Path to configuration JSON file (default: config.json)'
+        help='Path to configuration JSON file, directory of JSON shards or glob pattern '
+             '(default: config.json)'
     )
 
     parser.add_argument(
@@ -344,13 +2101,107 @@ For configuration format, see config.example.json
         help='Enable verbose output'
     )
 
+    parser.add_argument(
+        '-w', '--watch',
+        action='store_true',
+        help='Keep running and regenerate when the config file changes'
+    )
+
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=0.3,
+        help='Seconds the config must be unchanged before regenerating in watch mode '
+             '(default: 0.3)'
+    )
+
+    parser.add_argument(
+        '--no-validate',
+        action='store_true',
+        help='Skip checking config records against the schema'
+    )
+
+    parser.add_argument(
+        '--fail-fast',
+        action='store_true',
+        help='Stop at the first invalid record instead of reporting all of them'
+    )
+
+    parser.add_argument(
+        '--max-memory',
+        type=parse_memory_size,
+        metavar='SIZE',
+        help='Memory budget such as 512M or 2G; the workbook is streamed and large '
+             'sections are spilled to temporary files once it is reached'
+    )
+
+    parser.add_argument(
+        '--formats',
+        type=parse_formats,
+        default=('xlsx',),
+        metavar='LIST',
+        help='Comma-separated output formats: xlsx, csv, parquet (default: xlsx). '
+             'CSV and Parquet write one file per sheet next to the output'
+    )
+
+    parser.add_argument(
+        '--compression',
+        choices=list(COMPRESSION_LEVELS),
+        default='default',
+        help='Zip compression of the xlsx output: store (none, fastest), fast, '
+             'default or max (smallest, slowest) (default: default)'
+    )
+
+    parser.add_argument(
+        '--statements',
+        type=Path,
+        metavar='DIR',
+        help='Write one statement workbook per tenant into DIR instead of generating'
+    )
+
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        metavar='N',
+        help='Worker processes for --statements (default: CPU count)'
+    )
+
+    parser.add_argument(
+        '--diff',
+        nargs=2,
+        type=Path,
+        metavar=('OLD', 'NEW'),
+        help='Write a workbook of the changes between two snapshots (configs or '
+             'generated workbooks) instead of generating; output defaults to changes.xlsx'
+    )
+
     args = parser.parse_args()
 
+    if args.watch and args.max_memory:
+        parser.error('--watch cannot be combined with --max-memory')
+    if args.watch and args.formats != ('xlsx',):
+        parser.error('--watch only supports the xlsx format')
+    if args.statements and (args.watch or args.max_memory):
+        parser.error('--statements cannot be combined with --watch or --max-memory')
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+
+    budget = None
     try:
+        if args.diff:
+            old_path, new_path = args.diff
+            generate_diff(old_path, new_path, args.output or Path('changes.xlsx'),
+                          compression=args.compression)
+            return 0
+
         # Load configuration
         if args.verbose:
             print(f"Loading configuration from: {args.config}")
 
+        # Start tracking before loading so the parsed config is counted
+        if args.max_memory:
+            budget = MemoryBudget(args.max_memory)
+
         config = load_config(args.config)
 
         # Determine output path
@@ -365,10 +2216,28 @@ For configuration format, see config.example.json
             print(f"Output will be saved to: {output_path}")
 
         # Generate Excel file
-        generate_excel(config, output_path)
+        if args.statements:
+            validator = None if args.no_validate else ConfigValidator(fail_fast=args.fail_fast)
+            generate_statements(config, args.statements, jobs=args.jobs, validator=validator,
+                                compression=args.compression)
+        elif args.watch:
+            watch_config(args.config, output_path, debounce=args.debounce, verbose=args.verbose,
+                         compression=args.compression, validate=not args.no_validate,
+                         fail_fast=args.fail_fast, config=config)
+        else:
+            validator = None if args.no_validate else ConfigValidator(fail_fast=args.fail_fast)
+            generate_excel(
+                config, output_path, budget=budget, validator=validator,
+                formats=args.formats, compression=args.compression
+            )
 
         return 0
 
+    except KeyboardInterrupt:
+        # Watch mode handles Ctrl+C itself; anywhere else the output may be incomplete
+        print("\nInterrupted.", file=sys.stderr)
+        return 130
+
     except FileNotFoundError as e:
         print(f"Error: {e}", file=sys.stderr)
         return 1
@@ -385,6 +2254,10 @@ For configuration format, see config.example.json
         print(f"Error: Missing required key in config: {e}", file=sys.stderr)
         return 1
 
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
     except Exception as e:
         print(f"Unexpected error: {e}", file=sys.stderr)
         if args.verbose:
@@ -392,6 +2265,10 @@ For configuration format, see config.example.json
             traceback.print_exc()
         return 1
 
+    finally:
+        if budget is not None:
+            budget.stop()
+
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -7,6 +7,35 @@ import tempfile
 from pathlib import Path
 
 
+def pytest_addoption(parser):
+    """Add command-line options for the performance test tier"""
+    parser.addoption(
+        "--perf", action="store_true", default=False,
+        help="run performance regression tests against tests/perf_baseline.json"
+    )
+    parser.addoption(
+        "--update-perf-baseline", action="store_true", default=False,
+        help="run performance tests and rewrite tests/perf_baseline.json"
+    )
+
+
+def pytest_configure(config):
+    """Register custom markers"""
+    config.addinivalue_line(
+        "markers", "perf: performance regression test (run with --perf)"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip performance tests unless explicitly requested"""
+    if config.getoption("--perf") or config.getoption("--update-perf-baseline"):
+        return
+    skip_perf = pytest.mark.skip(reason="performance test, use --perf to run")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip_perf)
+
+
 @pytest.fixture
 def temp_dir():
     """Provide a temporary directory for tests"""
@@ -2,20 +2,28 @@
 Unit tests for excel_generate_v2.py
 """
 
+import csv
 import json
+import subprocess
 import sys
 import tempfile
+import threading
+import time
+import zipfile
 from datetime import datetime
 from pathlib import Path
 
 import pytest
 import openpyxl
+from openpyxl.utils.indexed_list import IndexedList
 
 # Add parent directory to path to import the module
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from excel_generate_v2 import (
     load_config,
+    merge_configs,
+    resolve_config_paths,
     parse_date,
     set_cell_style,
     generate_excel,
@@ -24,6 +32,35 @@ from excel_generate_v2 import (
     create_tenants_sheet,
     create_rents_sheet,
     create_expenses_sheet,
+    build_workbook,
+    CHANGE_ADDED,
+    CHANGE_MODIFIED,
+    CHANGE_REMOVED,
+    Snapshot,
+    diff_snapshots,
+    generate_diff,
+    ConfigValidationError,
+    ConfigValidator,
+    SECTION_VALIDATORS,
+    MemoryBudget,
+    SpilledRecords,
+    parse_memory_size,
+    spill_sections,
+    regenerate_changed_sections,
+    watch_config,
+    parse_formats,
+    export_path,
+    SheetWriter,
+    StatementTemplate,
+    STATEMENT_TOTALS,
+    RENTS_SHEET,
+    _WORKBOOK_STYLE_TABLES,
+    _WORKBOOK_FORMAT_MAPS,
+    generate_statements,
+    contract_rents,
+    COMPRESSION_LEVELS,
+    main,
+    save_workbook,
 )
 
 
@@ -63,6 +100,91 @@ class TestLoadConfig:
             load_config(config_file)
 
 
+class TestShardedConfig:
+    """Tests for loading a config split into one file per building"""
+
+    @staticmethod
+    def _write_shard(directory, name, building, unit_nos):
+        shard = {
+            "buildings": [{"name": building, "units": len(unit_nos), "notes": ""}],
+            "units": [{"unit_no": no, "building": building} for no in unit_nos],
+            "rents_paid": [{"unit_no": no, "year": 2024} for no in unit_nos],
+        }
+        path = directory / name
+        path.write_text(json.dumps(shard, ensure_ascii=False), encoding='utf-8')
+        return path
+
+    def test_load_directory(self, tmp_path):
+        """Test merging every JSON shard in a directory"""
+        self._write_shard(tmp_path, "b.json", "عمارة ب", ["201"])
+        self._write_shard(tmp_path, "a.json", "عمارة أ", ["101", "102"])
+
+        result = load_config(tmp_path)
+
+        assert [b["name"] for b in result["buildings"]] == ["عمارة أ", "عمارة ب"]
+        assert [u["unit_no"] for u in result["units"]] == ["101", "102", "201"]
+        assert len(result["rents_paid"]) == 3
+        assert result["tenants"] == []
+
+    def test_load_glob(self, tmp_path):
+        """Test selecting shards with a glob pattern"""
+        self._write_shard(tmp_path, "a.json", "عمارة أ", ["101"])
+        self._write_shard(tmp_path, "b.json", "عمارة ب", ["201"])
+        (tmp_path / "notes.txt").write_text("ignored")
+
+        assert resolve_config_paths(tmp_path / "*.json") == [tmp_path / "a.json", tmp_path / "b.json"]
+        assert len(load_config(tmp_path / "*.json")["buildings"]) == 2
+
+    def test_same_unit_no_in_different_buildings(self, tmp_path):
+        """Test that unit numbers only need to be unique per building"""
+        self._write_shard(tmp_path, "a.json", "عمارة أ", ["101"])
+        self._write_shard(tmp_path, "b.json", "عمارة ب", ["101"])
+
+        assert len(load_config(tmp_path)["units"]) == 2
+
+    def test_duplicate_building(self, tmp_path):
+        """Test that a building defined in two shards is rejected"""
+        self._write_shard(tmp_path, "a.json", "عمارة أ", ["101"])
+        self._write_shard(tmp_path, "b.json", "عمارة أ", ["201"])
+
+        with pytest.raises(ValueError) as exc_info:
+            load_config(tmp_path)
+        assert "Duplicate building 'عمارة أ'" in str(exc_info.value)
+
+    def test_duplicate_unit(self):
+        """Test that a repeated unit_no within one building is rejected"""
+        shard = {"units": [
+            {"unit_no": "101", "building": "عمارة أ"},
+            {"unit_no": "101", "building": "عمارة أ"},
+        ]}
+
+        with pytest.raises(ValueError) as exc_info:
+            merge_configs([shard], [Path("a.json")])
+        assert "Duplicate unit '101'" in str(exc_info.value)
+
+    def test_invalid_json_names_shard(self, tmp_path):
+        """Test that a JSON error says which shard it came from"""
+        self._write_shard(tmp_path, "a.json", "عمارة أ", ["101"])
+        (tmp_path / "b.json").write_text('{"buildings": [{,}]}', encoding="utf-8")
+
+        with pytest.raises(json.JSONDecodeError) as exc_info:
+            load_config(tmp_path)
+        assert str(tmp_path / "b.json") in str(exc_info.value)
+
+    def test_section_must_be_list(self):
+        """Test that a section that isn't a list is rejected with its shard"""
+        shard = {"buildings": {"name": "عمارة أ"}}
+
+        with pytest.raises(ValueError) as exc_info:
+            merge_configs([shard], [Path("a.json")])
+        assert "Section 'buildings' in a.json must be a list" in str(exc_info.value)
+
+    def test_empty_directory(self, tmp_path):
+        """Test that a directory without shards is reported"""
+        with pytest.raises(FileNotFoundError):
+            load_config(tmp_path)
+
+
 class TestParseDate:
     """Tests for parse_date function"""
 
@@ -215,6 +337,29 @@ class TestGenerateExcel:
         units_sheet = wb['الوحدات']
         assert units_sheet['A2'].value == "101"
 
+    @pytest.mark.parametrize("compression", list(COMPRESSION_LEVELS))
+    def test_compression_levels(self, tmp_path, sample_config, compression):
+        """Test that every compression level writes a readable workbook"""
+        output_file = tmp_path / f"{compression}.xlsx"
+        generate_excel(sample_config, output_file, compression=compression)
+
+        with zipfile.ZipFile(output_file) as archive:
+            methods = {info.compress_type for info in archive.infolist()}
+        expected = zipfile.ZIP_STORED if compression == "store" else zipfile.ZIP_DEFLATED
+        assert methods == {expected}
+        wb = openpyxl.load_workbook(output_file)
+        assert wb['الوحدات']['A2'].value == "101"
+
+    def test_store_is_larger_than_max(self, tmp_path, sample_config):
+        """Test that the levels trade file size as documented"""
+        sample_config['rents_paid'] = sample_config['rents_paid'] * 200
+        sizes = {}
+        for compression in ("store", "max"):
+            output_file = tmp_path / f"{compression}.xlsx"
+            generate_excel(sample_config, output_file, compression=compression)
+            sizes[compression] = output_file.stat().st_size
+        assert sizes["store"] > sizes["max"] * 3
+
 
 class TestCreateSheets:
     """Tests for individual sheet creation functions"""
@@ -273,6 +418,734 @@ class TestCreateSheets:
         sheet = wb['الإيجارات']
         # Check that unpaid rent row is highlighted (openpyxl uses ARGB format)
         assert sheet['A2'].fill.start_color.rgb == "00FFC7CE"
+        # Empty notes on a highlighted row are still written to keep the fill
+        assert sheet['H2'].fill.start_color.rgb == "00FFC7CE"
+
+    def test_date_cells_keep_date_format(self):
+        """Test that shared row styles don't drop the date number format"""
+        wb = openpyxl.Workbook()
+        del wb['Sheet']
+
+        rents = [
+            {"unit_no": "101", "month": "يناير", "year": 2024, "amount": 5000,
+             "date": None, "status": "مدفوع"},
+            {"unit_no": "102", "month": "يناير", "year": 2024, "amount": 5000,
+             "date": "2024-01-05", "status": "مدفوع"},
+        ]
+        create_rents_sheet(wb, rents)
+
+        sheet = wb['الإيجارات']
+        assert sheet['E3'].is_date
+        assert sheet['E3'].number_format == 'yyyy-mm-dd'
+        assert sheet['E3'].border.left.style == "thin"
+        assert sheet['D3'].number_format == 'General'
+
+    def test_empty_cells_keep_borders(self):
+        """Test that empty notes are written as bordered cells, not a column style"""
+        wb = openpyxl.Workbook()
+        del wb['Sheet']
+
+        units = [
+            {"unit_no": "101", "building": "عمارة أ", "notes": ""},
+            {"unit_no": "102", "building": "عمارة أ", "notes": "صيانة"},
+        ]
+        create_units_sheet(wb, units)
+
+        sheet = wb['الوحدات']
+        assert sheet['F2'].value in ("", None)
+        assert sheet['F2'].border.left.style == "thin"
+        assert sheet['F3'].value == "صيانة"
+        # A column style would draw borders down to the last row of the sheet
+        assert sheet.column_dimensions['F'].border.left.style is None
+
+
+class TestValidation:
+    """Tests for schema validation of config records"""
+
+    def test_valid_sample_config(self, sample_config):
+        """Test that the sample config passes validation"""
+        validator = ConfigValidator()
+        for key, records in sample_config.items():
+            if key in SECTION_VALIDATORS:
+                list(validator.stream(key, records))
+        validator.check()
+        assert validator.issues == []
+
+    def test_invalid_values_reported_with_path_and_row(self):
+        """Test that type, enum and date problems are all collected"""
+        rents = [
+            {"unit_no": "101", "month": "يناير", "year": 2024, "amount": 2000, "status": "مدفوع"},
+            {"unit_no": "102", "month": "يناير", "year": 2024, "amount": "2000",
+             "date": "2024-02-30", "method": "بطاقة", "status": "مدفوع"},
+            {"unit_no": "103", "month": "يناير", "year": 2024, "amount": None, "status": ""},
+        ]
+        validator = ConfigValidator()
+        assert list(validator.stream('rents_paid', rents)) == rents[:1]
+
+        paths = [(issue.path, issue.row) for issue in validator.issues]
+        assert paths == [
+            ("$.rents_paid[1].amount", 3),
+            ("$.rents_paid[1].date", 3),
+            ("$.rents_paid[1].method", 3),
+            ("$.rents_paid[2].amount", 4),
+            ("$.rents_paid[2].status", 4),
+        ]
+        with pytest.raises(ConfigValidationError) as exc_info:
+            validator.check()
+        assert "5 invalid value(s)" in str(exc_info.value)
+        assert "expected a number, got str '2000'" in str(exc_info.value)
+
+    def test_bool_is_not_a_number(self):
+        """Test that booleans are rejected for numeric fields"""
+        problems = SECTION_VALIDATORS['units']({"unit_no": 1, "building": "أ", "rent": True})
+        assert problems == [("rent", "expected a number, got bool True")]
+
+    def test_unit_status_is_free_text(self):
+        """Test that unit statuses are not limited to one spelling"""
+        for status in ("مُؤجّرة", "مؤجرة", "تحت الصيانة"):
+            unit = {"unit_no": "101", "building": "عمارة أ", "status": status}
+            assert SECTION_VALIDATORS['units'](unit) is None
+
+    def test_non_object_record(self):
+        """Test that a record that isn't an object is reported"""
+        validator = ConfigValidator()
+        list(validator.stream('buildings', ["عمارة أ"]))
+        assert validator.issues[0].path == "$.buildings[0]"
+
+    def test_non_list_section(self):
+        """Test that a section that isn't a list is reported as a whole"""
+        validator = ConfigValidator()
+        assert list(validator.stream('expenses', None)) == []
+        assert validator.issues[0].path == "$.expenses"
+        assert "expected a list of records, got NoneType" in validator.issues[0].message
+
+    def test_fail_fast(self):
+        """Test that fail-fast stops at the first invalid record"""
+        buildings = [{"name": ""}, {"name": None}]
+        validator = ConfigValidator(fail_fast=True)
+
+        with pytest.raises(ConfigValidationError) as exc_info:
+            list(validator.stream('buildings', buildings))
+        assert [issue.path for issue in exc_info.value.issues] == ["$.buildings[0].name"]
+
+    def test_generate_excel_rejects_invalid_config(self, tmp_path, sample_config):
+        """Test that nothing is written when validation fails"""
+        sample_config['units'][0]['rent'] = "غير معروف"
+        output_file = tmp_path / "invalid.xlsx"
+
+        with pytest.raises(ConfigValidationError) as exc_info:
+            generate_excel(sample_config, output_file, validator=ConfigValidator())
+        assert exc_info.value.issues[0].path == "$.units[0].rent"
+        assert not output_file.exists()
+
+    @pytest.mark.parametrize("section, value, path", [
+        ("rents_paid", [{"unit_no": "101", "month": "يناير", "year": 2024, "amount": 2000,
+                         "date": 20240105, "status": "مدفوع"}], "$.rents_paid[0].date"),
+        ("buildings", ["عمارة أ"], "$.buildings[0]"),
+        ("expenses", None, "$.expenses"),
+    ])
+    def test_invalid_records_reported_not_crashing(self, tmp_path, sample_config,
+                                                   section, value, path):
+        """Test that records the sheet builders can't convert are reported by path"""
+        sample_config[section] = value
+
+        with pytest.raises(ConfigValidationError) as exc_info:
+            generate_excel(sample_config, tmp_path / "invalid.xlsx", validator=ConfigValidator())
+        assert [issue.path for issue in exc_info.value.issues] == [path]
+
+    def test_main_reports_invalid_config(self, tmp_path, sample_config, capsys, monkeypatch):
+        """Test that the CLI exits with the JSON path of an invalid record"""
+        sample_config['rents_paid'][0]['date'] = 20240105
+        sample_config['buildings'].append("عمارة ج")
+        sample_config['expenses'] = None
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps(sample_config), encoding="utf-8")
+        monkeypatch.setattr(sys, "argv", [
+            "excel_generate_v2.py", "-c", str(config_file), "-o", str(tmp_path / "out.xlsx")
+        ])
+
+        assert main() == 1
+        err = capsys.readouterr().err
+        assert "$.rents_paid[0].date" in err
+        assert "$.buildings[2] " in err
+        assert "$.expenses " in err
+        assert "Unexpected error" not in err
+
+
+class TestDiff:
+    """Tests for comparing two portfolio snapshots"""
+
+    @staticmethod
+    def _write_config(path, config):
+        path.write_text(json.dumps(config, ensure_ascii=False), encoding='utf-8')
+        return path
+
+    def test_diff_configs(self, tmp_path, sample_config):
+        """Test detecting new tenants, rent changes and rents flipped to paid"""
+        sample_config['rents_paid'][0].update(status='غير مدفوع', date=None)
+        old_file = self._write_config(tmp_path / "old.json", sample_config)
+
+        sample_config['rents_paid'][0].update(status='مدفوع', date='2024-01-20')
+        sample_config['units'][0]['rent'] = 2200
+        sample_config['tenants'].append({**sample_config['tenants'][0], 'unit_no': '102'})
+        sample_config['expenses'] = []
+        new_file = self._write_config(tmp_path / "new.json", sample_config)
+
+        old, new = Snapshot(old_file), Snapshot(new_file)
+        changes = {(c.section, c.kind, c.key, c.field): (c.old, c.new)
+                   for c in diff_snapshots(old, new)}
+
+        assert changes[('units', CHANGE_MODIFIED, ('عمارة أ', '101'), 'rent')] == (2000, 2200)
+        assert changes[('rents_paid', CHANGE_MODIFIED, ('101', 2024, 'يناير'), 'status')] == (
+            'غير مدفوع', 'مدفوع'
+        )
+        assert changes[('rents_paid', CHANGE_MODIFIED, ('101', 2024, 'يناير'), 'date')] == (
+            '', '2024-01-20'
+        )
+        assert ('tenants', CHANGE_ADDED, ('102',), '') in changes
+        assert ('expenses', CHANGE_REMOVED, ('عمارة أ', '2024-01-01', 'فاتورة كهرباء'), '') in changes
+        assert len(changes) == 5
+
+    def test_duplicate_keys_matched_in_order(self, tmp_path, sample_config):
+        """Test that records sharing a natural key are paired by occurrence"""
+        expense = sample_config['expenses'][0]
+        sample_config['expenses'] = [expense, {**expense, 'amount': 100}]
+        old_file = self._write_config(tmp_path / "old.json", sample_config)
+        sample_config['expenses'][1]['amount'] = 150
+        new_file = self._write_config(tmp_path / "new.json", sample_config)
+
+        changes = diff_snapshots(Snapshot(old_file), Snapshot(new_file))
+
+        assert [(c.kind, c.field, c.old, c.new) for c in changes] == [
+            (CHANGE_MODIFIED, 'amount', 100, 150)
+        ]
+
+    def test_workbook_matches_its_config(self, tmp_path, sample_config):
+        """Test that a generated workbook and its config compare equal"""
+        sample_config['rents_paid'][0]['date'] = None
+        # Optional fields left out of the config are written with defaults
+        del sample_config['buildings'][0]['units']
+        del sample_config['units'][0]['rent']
+        del sample_config['tenants'][0]['notes']
+        config_file = self._write_config(tmp_path / "config.json", sample_config)
+        workbook_file = tmp_path / "snapshot.xlsx"
+        generate_excel(sample_config, workbook_file)
+
+        workbook = Snapshot(workbook_file)
+        try:
+            assert diff_snapshots(workbook, Snapshot(config_file)) == []
+        finally:
+            workbook.close()
+
+    def test_generate_diff_workbook(self, tmp_path, sample_config):
+        """Test writing the styled changes workbook"""
+        old_file = self._write_config(tmp_path / "old.json", sample_config)
+        sample_config['units'][0]['status'] = 'شاغرة'
+        new_file = self._write_config(tmp_path / "new.json", sample_config)
+        output_file = tmp_path / "changes.xlsx"
+
+        changes = generate_diff(old_file, new_file, output_file)
+
+        assert len(changes) == 1
+        wb = openpyxl.load_workbook(output_file)
+        assert wb.sheetnames == ['ملخص التغييرات', 'التغييرات']
+        assert [cell.value for cell in wb['ملخص التغييرات'][3]] == ['الوحدات', 0, 0, 1]
+        row = wb['التغييرات'][2]
+        assert [cell.value for cell in row] == [
+            'الوحدات', CHANGE_MODIFIED, 'عمارة أ / 101', 'الحالة', 'مُؤجّرة', 'شاغرة'
+        ]
+        assert row[0].fill.start_color.rgb == "00FFEB9C"
+
+    def test_missing_workbook(self, tmp_path):
+        """Test that a missing snapshot workbook is reported"""
+        with pytest.raises(FileNotFoundError):
+            Snapshot(tmp_path / "missing.xlsx")
+
+
+class TestMemoryBudget:
+    """Tests for memory-budgeted generation with spill to disk"""
+
+    def test_parse_memory_size(self):
+        """Test parsing memory sizes with and without suffixes"""
+        assert parse_memory_size("1048576") == 1048576
+        assert parse_memory_size("512M") == 512 * 1024 ** 2
+        assert parse_memory_size("1.5g") == int(1.5 * 1024 ** 3)
+        assert parse_memory_size("64KB") == 64 * 1024
+
+    def test_parse_invalid_memory_size(self):
+        """Test that invalid sizes are rejected"""
+        with pytest.raises(ValueError):
+            parse_memory_size("lots")
+        with pytest.raises(ValueError):
+            parse_memory_size("0")
+
+    def test_spilled_records_round_trip(self):
+        """Test that spilled records are read back unchanged, repeatedly"""
+        records = [{"unit_no": "101", "month": "يناير", "date": None}, {"unit_no": "102"}]
+        spilled = SpilledRecords(records)
+
+        assert len(spilled) == 2
+        assert spilled.size > 0
+        assert list(spilled) == records
+        assert list(spilled) == records
+        spilled.close()
+
+    def test_spill_largest_section_first(self, sample_config):
+        """Test that spilling starts with the largest section"""
+        sample_config['rents_paid'] = sample_config['rents_paid'] * 5
+        budget = MemoryBudget(1)
+        try:
+            spilled = spill_sections(sample_config, budget)
+        finally:
+            budget.stop()
+
+        assert spilled[0] == 'rents_paid'
+        assert isinstance(sample_config['rents_paid'], SpilledRecords)
+        assert budget.spilled_bytes > 0
+
+    def test_spilling_frees_memory(self, tmp_path, sample_config, monkeypatch):
+        """Test that spilling frees the records and stops once under the limit"""
+        # tracemalloc gives exact numbers, unlike RSS
+        monkeypatch.setattr("excel_generate_v2._current_rss", lambda: None)
+        checks = []
+
+        def recording_spill(config, budget):
+            before = budget.used()
+            spilled = spill_sections(config, budget)
+            checks.append((spilled, before, budget.used()))
+            return spilled
+
+        monkeypatch.setattr("excel_generate_v2.spill_sections", recording_spill)
+        output_file = tmp_path / "budgeted.xlsx"
+        budget = MemoryBudget(1)
+        try:
+            # Only memory allocated after the budget was created is counted
+            config = json.loads(json.dumps(sample_config))
+            rent = config['rents_paid'][0]
+            config['rents_paid'] = [
+                dict(rent, status='غير مدفوع', notes=f"دفعة {i}") for i in range(5000)
+            ]
+            budget.limit = budget.used() // 2
+            generate_excel(config, output_file, budget=budget)
+        finally:
+            budget.stop()
+
+        spilled, before, after = checks[0]
+        assert spilled == ['rents_paid']
+        assert after < budget.limit < before
+        # Every section is handed over and released once written
+        assert not any(key in config for key in SECTION_VALIDATORS)
+        wb = openpyxl.load_workbook(output_file)
+        assert wb['الإيجارات'].max_row == 5001
+        assert wb['الإيجارات']['A2'].fill.start_color.rgb == "00FFC7CE"
+        assert wb['الوحدات']['A2'].value == "101"
+
+    def test_spilled_files_closed(self, tmp_path, sample_config, monkeypatch):
+        """Test that spill files are closed once generation finishes"""
+        created = []
+        original_init = SpilledRecords.__init__
+
+        def tracking_init(self, records):
+            original_init(self, records)
+            created.append(self)
+
+        monkeypatch.setattr(SpilledRecords, "__init__", tracking_init)
+        budget = MemoryBudget(1)
+        try:
+            generate_excel(sample_config, tmp_path / "budgeted.xlsx", budget=budget)
+        finally:
+            budget.stop()
+
+        assert created
+        assert all(records._file.closed for records in created)
+
+    def test_main_stops_budget(self, tmp_path, sample_config, monkeypatch):
+        """Test that the CLI stops its memory budget"""
+        stopped = []
+        monkeypatch.setattr(MemoryBudget, "stop", lambda self: stopped.append(self))
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps(sample_config), encoding="utf-8")
+        monkeypatch.setattr(sys, "argv", [
+            "excel_generate_v2.py", "-c", str(config_file), "-o", str(tmp_path / "out.xlsx"),
+            "--max-memory", "1K"
+        ])
+
+        assert main() == 0
+        assert len(stopped) == 1
+
+
+class TestExportFormats:
+    """Tests for CSV and Parquet export alongside the workbook"""
+
+    def test_parse_formats(self):
+        """Test parsing and ordering of format lists"""
+        assert parse_formats("xlsx") == ("xlsx",)
+        assert parse_formats("parquet, CSV,csv") == ("csv", "parquet")
+        with pytest.raises(ValueError):
+            parse_formats("xlsx,pdf")
+        with pytest.raises(ValueError):
+            parse_formats(",")
+
+    def test_export_path(self, tmp_path):
+        """Test that export files are named after the output and sheet"""
+        path = export_path(tmp_path / "report.xlsx", "الإيجارات", "csv")
+        assert path == tmp_path / "report.الإيجارات.csv"
+
+    def test_sheet_writer_is_abstract(self):
+        """Test that a writer must implement write_row"""
+        class IncompleteWriter(SheetWriter):
+            pass
+
+        with pytest.raises(TypeError):
+            IncompleteWriter()
+
+    def test_csv_only(self, tmp_path, sample_config):
+        """Test CSV export with Arabic headers and ISO dates, without a workbook"""
+        output_file = tmp_path / "report.xlsx"
+        generate_excel(sample_config, output_file, formats=("csv",))
+
+        assert not output_file.exists()
+        with open(export_path(output_file, "الإيجارات", "csv"), encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0][:3] == ["رقم الوحدة", "الشهر", "السنة"]
+        assert rows[1][:5] == ["101", "يناير", "2024", "2000", "2024-01-05"]
+        assert len(list(tmp_path.glob("report.*.csv"))) == 5
+        assert not list(tmp_path.glob("*.part"))
+
+    def test_parquet_keeps_types(self, tmp_path, sample_config):
+        """Test that Parquet columns are named after fields and typed"""
+        pq = pytest.importorskip("pyarrow.parquet")
+        output_file = tmp_path / "report.xlsx"
+        sample_config['rents_paid'].append(dict(
+            sample_config['rents_paid'][0], date=None, method="", status="غير مدفوع"
+        ))
+        generate_excel(sample_config, output_file, formats=("xlsx", "parquet"))
+
+        assert output_file.exists()
+        table = pq.read_table(export_path(output_file, "الإيجارات", "parquet"))
+        assert table.column_names[:3] == ["unit_no", "month", "year"]
+        assert str(table.schema.field("amount").type) == "double"
+        assert str(table.schema.field("date").type) == "date32[day]"
+        assert table.column("date").to_pylist() == [datetime(2024, 1, 5).date(), None]
+
+    def test_invalid_config_leaves_no_exports(self, tmp_path, sample_config):
+        """Test that nothing is written when validation fails"""
+        output_file = tmp_path / "report.xlsx"
+        sample_config['units'][0]['rent'] = "ألفين"
+
+        with pytest.raises(ConfigValidationError):
+            generate_excel(sample_config, output_file, validator=ConfigValidator(),
+                           formats=("xlsx", "csv"))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_failed_save_leaves_no_exports(self, tmp_path, sample_config, monkeypatch):
+        """Test that exports are rolled back when the workbook can't be saved"""
+        def locked(*args, **kwargs):
+            raise PermissionError("file is open")
+
+        monkeypatch.setattr("excel_generate_v2.save_workbook", locked)
+        with pytest.raises(PermissionError):
+            generate_excel(sample_config, tmp_path / "report.xlsx", formats=("xlsx", "csv"))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_failed_parquet_writer_leaves_no_part_file(self, tmp_path, sample_config,
+                                                       monkeypatch):
+        """Test that the .part file is removed when the Parquet writer can't be created"""
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        def broken_writer(path, schema):
+            Path(path).write_bytes(b"PAR1")
+            raise OSError("disk full")
+
+        monkeypatch.setattr(pq, "ParquetWriter", broken_writer)
+        with pytest.raises(OSError):
+            generate_excel(sample_config, tmp_path / "report.xlsx",
+                           formats=("csv", "parquet"))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_pyarrow_imported_lazily(self):
+        """Test that importing the module doesn't load pyarrow"""
+        code = "import sys, excel_generate_v2; print('pyarrow' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=Path(__file__).parent.parent,
+            capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "False"
+
+
+class TestStatements:
+    """Tests for per-tenant statement generation"""
+
+    def test_fill_template(self, sample_config):
+        """Test that a statement holds the contract, rents and balance"""
+        rents = sample_config['rents_paid'] + [dict(
+            sample_config['rents_paid'][0], month="فبراير", date=None,
+            method="", status="غير مدفوع"
+        )]
+        template = StatementTemplate()
+        sheet = template.fill(sample_config['tenants'][0], rents).active
+
+        assert sheet['A2'].value == "اسم المستأجر"
+        assert sheet['B2'].value == "محمد أحمد"
+        assert sheet['B5'].is_date
+        assert sheet['A9'].font.bold is True
+        assert sheet['A11'].value == "فبراير"
+        assert sheet['A11'].fill.start_color.rgb == "00FFC7CE"
+        assert sheet['D10'].is_date
+        totals = [[cell.value for cell in row] for row in sheet['A13:B15']]
+        assert totals == [[STATEMENT_TOTALS[0], 4000], [STATEMENT_TOTALS[1], 2000],
+                          [STATEMENT_TOTALS[2], 2000]]
+
+        # The template itself is left untouched
+        assert template.workbook.active['B2'].value is None
+
+    def test_template_copy_survives_save(self, tmp_path, sample_config):
+        """Test the openpyxl internals the template copy relies on, through a saved statement"""
+        template = StatementTemplate()
+        for name in _WORKBOOK_STYLE_TABLES:
+            assert isinstance(getattr(template.workbook, name), IndexedList), name
+        for name in _WORKBOOK_FORMAT_MAPS:
+            assert isinstance(getattr(template.workbook, name), dict), name
+        assert isinstance(template.workbook.active._cells, dict)
+
+        rents = sample_config['rents_paid'] + [dict(
+            sample_config['rents_paid'][0], month="فبراير", date=None, status="غير مدفوع"
+        )]
+        template.fill(sample_config['tenants'][0], rents).save(tmp_path / "statement.xlsx")
+        sheet = openpyxl.load_workbook(tmp_path / "statement.xlsx").active
+
+        assert sheet.title == "كشف حساب"
+        assert sheet.column_dimensions['A'].width == 15
+        assert sheet['A1'].font.bold is True
+        assert sheet['A1'].fill.start_color.rgb == "00C0C0C0"
+        assert sheet['B2'].border.left.style == "thin"
+        assert sheet['B5'].number_format == 'yyyy-mm-dd'
+        assert sheet['D10'].number_format == 'yyyy-mm-dd'
+        assert sheet['A11'].fill.start_color.rgb == "00FFC7CE"
+        assert sheet['A13'].font.bold is True
+        assert sheet['B15'].value == 2000
+        assert sheet.max_column == len(RENTS_SHEET.headers) - 1
+
+    def test_generate_statements(self, tmp_path, sample_config, capsys):
+        """Test one file per tenant, with only the rents of their own contract"""
+        rent = sample_config['rents_paid'][0]
+        sample_config['rents_paid'] += [
+            dict(rent, month="يناير", year=2025, date="2025-01-05"),
+            dict(rent, month="فبراير", year=2025, amount=2500, date=None,
+                 method="", status="غير مدفوع"),
+        ]
+        # The next tenant of unit 101 takes over in 2025
+        sample_config['tenants'].append(dict(
+            sample_config['tenants'][0], name="سالم",
+            start_date="2025-01-01", end_date="2025-12-31"
+        ))
+        sample_config['tenants'].append(dict(sample_config['tenants'][0], unit_no="A/7"))
+
+        count = generate_statements(sample_config, tmp_path / "statements", jobs=1)
+
+        assert count == 3
+        assert "statements/s" in capsys.readouterr().out
+        names = sorted(path.name for path in (tmp_path / "statements").iterdir())
+        assert names == ["101.xlsx", "101_2.xlsx", "A_7.xlsx"]
+
+        first = openpyxl.load_workbook(tmp_path / "statements" / "101.xlsx").active
+        assert [first['B10'].value, first['A11'].value] == [2024, None]
+        assert [first['B13'].value, first['B14'].value] == [2000, 0]
+
+        second = openpyxl.load_workbook(tmp_path / "statements" / "101_2.xlsx").active
+        assert second['B2'].value == "سالم"
+        assert [second['B10'].value, second['B11'].value] == [2025, 2025]
+        totals = [second[f'B{row}'].value for row in (13, 14, 15)]
+        assert totals == [4500, 2000, 2500]
+
+        other = openpyxl.load_workbook(tmp_path / "statements" / "A_7.xlsx").active
+        assert other['A10'].value is None
+
+    def test_contract_rents(self, sample_config):
+        """Test that rents are placed by month, then payment date, then year"""
+        tenant = dict(sample_config['tenants'][0], start_date="2024-03-15", end_date=None)
+        rents = [
+            {"month": "فبراير", "year": 2024},
+            {"month": "مارس", "year": 2024},
+            {"month": "كانون الثاني", "year": 2030},
+            {"month": "سنوي 2023", "year": 2023, "date": "2024-04-01"},
+            {"month": "سنوي 2023", "year": 2023},
+        ]
+        assert contract_rents(tenant, rents) == rents[1:4]
+        assert contract_rents({"unit_no": "101"}, rents) == rents
+
+    def test_unit_in_two_buildings_skipped(self, tmp_path, sample_config, capsys):
+        """Test that tenants of a unit_no shared by two buildings are skipped"""
+        sample_config['units'].append(dict(sample_config['units'][0], building="عمارة ب"))
+
+        count = generate_statements(sample_config, tmp_path, jobs=1)
+
+        assert count == 0
+        assert "units numbered the same in several buildings: 101" in capsys.readouterr().err
+
+    def test_process_pool(self, tmp_path, sample_config):
+        """Test that statements are written by worker processes"""
+        sample_config['tenants'] = [
+            dict(sample_config['tenants'][0], unit_no=str(unit_no)) for unit_no in range(101, 105)
+        ]
+        generate_statements(sample_config, tmp_path, jobs=2)
+        assert len(list(tmp_path.glob("*.xlsx"))) == 4
+
+    def test_invalid_config_writes_nothing(self, tmp_path, sample_config):
+        """Test that no statements are written when validation fails"""
+        sample_config['rents_paid'][0]['status'] = "مدفوعة"
+        with pytest.raises(ConfigValidationError):
+            generate_statements(sample_config, tmp_path / "statements", jobs=1,
+                                validator=ConfigValidator())
+        assert not (tmp_path / "statements").exists()
+
+
+class TestWatchMode:
+    """Tests for incremental regeneration and watch mode"""
+
+    def test_regenerate_only_changed_sections(self, sample_config):
+        """Test that unchanged sheets are kept and order is preserved"""
+        wb = build_workbook(sample_config)
+        units_sheet = wb['الوحدات']
+        new_config = json.loads(json.dumps(sample_config))
+        new_config['rents_paid'][0]['status'] = 'غير مدفوع'
+
+        changed = regenerate_changed_sections(wb, sample_config, new_config)
+
+        assert changed == ['rents_paid']
+        assert wb['الوحدات'] is units_sheet
+        assert wb.sheetnames == ['العمارات', 'الوحدات', 'المستأجرين', 'الإيجارات', 'المصروفات']
+        assert wb['الإيجارات']['A2'].fill.start_color.rgb == "00FFC7CE"
+
+    def test_regenerate_no_changes(self, sample_config):
+        """Test that an identical config rebuilds nothing"""
+        wb = build_workbook(sample_config)
+        assert regenerate_changed_sections(wb, sample_config, sample_config) == []
+
+    def test_watch_regenerates_on_change(self, tmp_path, sample_config, capsys):
+        """Test that watch mode picks up a config edit"""
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps(sample_config, ensure_ascii=False))
+        output_file = tmp_path / "watched.xlsx"
+
+        watcher = threading.Thread(
+            target=watch_config,
+            args=(config_file, output_file),
+            kwargs={"interval": 0.01, "debounce": 0.05, "max_regenerations": 1},
+        )
+        watcher.start()
+        deadline = time.monotonic() + 10
+        while not output_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        sample_config['units'][0]['unit_no'] = "9999"
+        config_file.write_text(json.dumps(sample_config, ensure_ascii=False))
+        watcher.join(timeout=10)
+
+        assert not watcher.is_alive()
+        assert "Regenerated" in capsys.readouterr().out
+        wb = openpyxl.load_workbook(output_file)
+        assert wb['الوحدات']['A2'].value == "9999"
+
+    def test_watch_reuses_loaded_config(self, tmp_path, sample_config, monkeypatch):
+        """Test that a config passed in is not parsed again at startup"""
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps(sample_config, ensure_ascii=False))
+        loads = []
+        monkeypatch.setattr("excel_generate_v2.load_config", lambda path: loads.append(path))
+
+        watch_config(config_file, tmp_path / "watched.xlsx", max_regenerations=0,
+                     config=sample_config)
+
+        assert loads == []
+        assert (tmp_path / "watched.xlsx").exists()
+
+    def test_watch_skips_invalid_save(self, tmp_path, sample_config, capsys):
+        """Test that an invalid intermediate save is reported and the watcher keeps going"""
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps(sample_config, ensure_ascii=False))
+        output_file = tmp_path / "watched.xlsx"
+
+        watcher = threading.Thread(
+            target=watch_config,
+            args=(config_file, output_file),
+            kwargs={"interval": 0.01, "debounce": 0.05, "max_regenerations": 1},
+        )
+        watcher.start()
+        deadline = time.monotonic() + 10
+        while not output_file.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        invalid = json.loads(json.dumps(sample_config))
+        invalid['rents_paid'][0]['date'] = 20240105
+        invalid['buildings'].append("عمارة ج")
+        config_file.write_text(json.dumps(invalid, ensure_ascii=False))
+        err = ""
+        while "$.rents_paid[0].date" not in err and time.monotonic() < deadline:
+            time.sleep(0.01)
+            err += capsys.readouterr().err
+        assert "$.buildings[2]" in err
+        assert watcher.is_alive()
+
+        sample_config['units'][0]['unit_no'] = "9999"
+        config_file.write_text(json.dumps(sample_config, ensure_ascii=False))
+        watcher.join(timeout=10)
+
+        assert not watcher.is_alive()
+        wb = openpyxl.load_workbook(output_file)
+        assert wb['الوحدات']['A2'].value == "9999"
+
+    def test_cached_sheet_xml_reused(self, tmp_path, sample_config):
+        """Test that a save reuses unchanged sheets and forgets replaced ones"""
+        wb = build_workbook(sample_config)
+        sheet_xml = {}
+        save_workbook(wb, tmp_path / "first.xlsx", sheet_xml=sheet_xml)
+        units_sheet = wb['الوحدات']
+        rents_sheet = wb['الإيجارات']
+        assert units_sheet in sheet_xml
+
+        new_config = json.loads(json.dumps(sample_config))
+        new_config['rents_paid'][0]['status'] = 'غير مدفوع'
+        regenerate_changed_sections(wb, sample_config, new_config)
+        save_workbook(wb, tmp_path / "second.xlsx", sheet_xml=sheet_xml)
+
+        assert units_sheet in sheet_xml
+        assert rents_sheet not in sheet_xml
+        saved = openpyxl.load_workbook(tmp_path / "second.xlsx")
+        assert saved['الوحدات']['A2'].value == "101"
+        assert saved['الإيجارات']['A2'].fill.start_color.rgb == "00FFC7CE"
+
+    def test_cached_save_keeps_charts(self, tmp_path, sample_config):
+        """Test that sheets with charts are written by openpyxl on every save"""
+        from openpyxl.chart import BarChart, Reference
+
+        wb = build_workbook(sample_config)
+        sheet = wb['العمارات']
+        chart = BarChart()
+        chart.add_data(Reference(sheet, min_col=2, min_row=1, max_row=3), titles_from_data=True)
+        sheet.add_chart(chart, "E2")
+        sheet_xml = {}
+        save_workbook(wb, tmp_path / "first.xlsx", sheet_xml=sheet_xml)
+        save_workbook(wb, tmp_path / "second.xlsx", sheet_xml=sheet_xml)
+
+        assert sheet not in sheet_xml
+        assert wb['الوحدات'] in sheet_xml
+        saved = openpyxl.load_workbook(tmp_path / "second.xlsx")
+        assert len(saved['العمارات']._charts) == 1
+        assert saved['الوحدات']['A2'].value == "101"
+
+    def test_interrupt_outside_watch_fails(self, tmp_path, sample_config, monkeypatch, capsys):
+        """Test that Ctrl+C during a normal run exits non-zero"""
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps(sample_config), encoding="utf-8")
+
+        def interrupted(*args, **kwargs):
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr("excel_generate_v2.generate_excel", interrupted)
+        monkeypatch.setattr(sys, "argv", ["excel_generate_v2.py", "-c", str(config_file)])
+        assert main() == 130
+        assert "Interrupted" in capsys.readouterr().err
 
 
 if __name__ == '__main__':
@@ -0,0 +1,154 @@
+"""
+Performance regression tests for excel_generate_v2.py
+
+Run with `pytest tests/ --perf`. Each case is timed on a fixed-size synthetic
+portfolio and compared against tests/perf_baseline.json. Refresh the baseline
+with `pytest tests/test_performance.py --update-perf-baseline` after an
+intentional change, and commit it together with that change.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+import openpyxl
+
+# Add parent directory to path to import the module
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark import make_synthetic_config
+from excel_generate_v2 import (
+    generate_excel,
+    generate_statements,
+    create_buildings_sheet,
+    create_units_sheet,
+    create_tenants_sheet,
+    create_rents_sheet,
+    create_expenses_sheet,
+)
+
+BASELINE_PATH = Path(__file__).parent / "perf_baseline.json"
+
+# Fixed portfolio size: 10 buildings x 20 units x 12 months = 2400 rents
+PORTFOLIO = {"buildings": 10, "units_per_building": 20, "months": 12}
+
+# Allowed growth over the baseline, as a fraction
+DEFAULT_TOLERANCE = {"seconds": 0.5, "peak_mb": 0.25}
+
+# Growth below these absolute amounts is treated as noise
+NOISE_FLOOR = {"seconds": 0.02, "peak_mb": 0.5}
+
+# Timings are the best of this many runs, to reduce noise
+REPEATS = 3
+
+
+def _sheet_case(builder: Callable, key: str) -> Callable[[Dict[str, Any], Path], None]:
+    def run(config: Dict[str, Any], tmp_path: Path) -> None:
+        wb = openpyxl.Workbook()
+        builder(wb, config[key])
+    return run
+
+
+def _generate_case(config: Dict[str, Any], tmp_path: Path) -> None:
+    generate_excel(config, tmp_path / "perf.xlsx")
+
+
+def _statements_case(config: Dict[str, Any], tmp_path: Path) -> None:
+    generate_statements(config, tmp_path / "statements", jobs=1)
+
+
+CASES = {
+    "generate_excel": _generate_case,
+    "generate_statements": _statements_case,
+    "create_buildings_sheet": _sheet_case(create_buildings_sheet, "buildings"),
+    "create_units_sheet": _sheet_case(create_units_sheet, "units"),
+    "create_tenants_sheet": _sheet_case(create_tenants_sheet, "tenants"),
+    "create_rents_sheet": _sheet_case(create_rents_sheet, "rents_paid"),
+    "create_expenses_sheet": _sheet_case(create_expenses_sheet, "expenses"),
+}
+
+
+def _measure(run: Callable[[Dict[str, Any], Path], None],
+             config: Dict[str, Any], tmp_path: Path) -> Dict[str, float]:
+    """Return best-of wall time and traced peak memory for a case"""
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        run(config, tmp_path)
+        timings.append(time.perf_counter() - started)
+
+    # Measured separately because tracing slows the code down
+    tracemalloc.start()
+    try:
+        run(config, tmp_path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": round(min(timings), 4), "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+def _load_baseline() -> Dict[str, Any]:
+    if not BASELINE_PATH.exists():
+        return {"portfolio": PORTFOLIO, "tolerance": DEFAULT_TOLERANCE, "cases": {}}
+    return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+
+
+def _over_limit(metric: str, measured: Dict[str, float],
+                expected: Dict[str, float], tolerance: Dict[str, float]) -> bool:
+    """Check whether a metric grew past both the tolerance and the noise floor"""
+    growth = measured[metric] - expected[metric]
+    return growth > expected[metric] * tolerance[metric] and growth > NOISE_FLOOR[metric]
+
+
+def _format_regressions(name: str, measured: Dict[str, float],
+                        expected: Dict[str, float], tolerance: Dict[str, float]) -> str:
+    """Build a readable table comparing a case with its baseline"""
+    lines = [f"{name} regressed against {BASELINE_PATH.name}:"]
+    for metric, unit in (("seconds", "s"), ("peak_mb", "MB")):
+        change = measured[metric] / expected[metric] - 1 if expected[metric] else 0.0
+        flag = "  <-- over limit" if _over_limit(metric, measured, expected, tolerance) else ""
+        lines.append(
+            f"  {metric:<8} baseline {expected[metric]:>9.3f} {unit:<2}  "
+            f"now {measured[metric]:>9.3f} {unit:<2}  "
+            f"({change:+.0%}, limit +{tolerance[metric]:.0%}){flag}"
+        )
+    lines.append("Refresh the baseline with --update-perf-baseline if this is intended.")
+    return "\n".join(lines)
+
+
+@pytest.fixture(scope="module")
+def perf_config():
+    """Provide the fixed-size synthetic portfolio"""
+    return make_synthetic_config(**PORTFOLIO)
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize("name", list(CASES))
+def test_no_performance_regression(name, perf_config, tmp_path, request, capsys):
+    """Test that a hot path stays within tolerance of the committed baseline"""
+    measured = _measure(CASES[name], perf_config, tmp_path)
+    capsys.readouterr()
+    baseline = _load_baseline()
+
+    if request.config.getoption("--update-perf-baseline"):
+        baseline["cases"][name] = measured
+        BASELINE_PATH.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+        )
+        return
+
+    assert baseline["portfolio"] == PORTFOLIO, (
+        "Baseline was recorded on a different portfolio; refresh it with --update-perf-baseline"
+    )
+    if name not in baseline["cases"]:
+        pytest.fail(f"No baseline for {name}; record one with --update-perf-baseline")
+
+    expected = baseline["cases"][name]
+    tolerance = {**DEFAULT_TOLERANCE, **baseline.get("tolerance", {})}
+    regressed = any(_over_limit(metric, measured, expected, tolerance) for metric in NOISE_FLOOR)
+    assert not regressed, _format_regressions(name, measured, expected, tolerance)